@@ -14,6 +14,7 @@ import sys
 import time
 import socket
 import signal
+import logging
 import argparse
 import threading
 from pathlib import Path
@@ -62,6 +63,11 @@ class ClawChatClient:
         self.connection_id: Optional[str] = None
         self.server_address: Optional[Tuple[str, int]] = None
         
+        # Receive buffer reused for every datagram; packets are decrypted
+        # straight from a view of it
+        self._rx_buf = bytearray(65535)
+        self._rx_view = memoryview(self._rx_buf)
+        
         # Stats
         self.messages_received = 0
         self.messages_sent = 0
@@ -90,8 +96,6 @@ class ClawChatClient:
             True if successful
         """
         try:
-            import base64
-            
             manager = SecurityFileManager(bootstrap_key=self.bootstrap_key)
             self.security_file = manager.load_security_file(filepath)
             
@@ -101,7 +105,7 @@ class ClawChatClient:
                 return False
             
             # Decode shared secret
-            self.shared_secret = base64.b64decode(self.security_file.shared_secret)
+            self.shared_secret = self.security_file.shared_secret_bytes
             
             # Set server address
             self.server_address = (
@@ -127,8 +131,8 @@ class ClawChatClient:
         
         strategy = detector.get_hole_punch_strategy(nat_type)
         print(f"[Client] NAT type: {nat_type.value}")
-        print(f"[Client] Strategy: {strategy['description']}")
-        print(f"[Client] Expected success: {strategy['success_rate']*100:.0f}%")
+        print(f"[Client] Strategy: {strategy.description}")
+        print(f"[Client] Expected success: {strategy.success_rate*100:.0f}%")
         
         return nat_type
     
@@ -270,16 +274,16 @@ class ClawChatClient:
         while self.running:
             try:
                 self.socket.settimeout(1.0)
-                data, addr = self.socket.recvfrom(2048)
-                self._handle_packet(data, addr)
+                nbytes, addr = self.socket.recvfrom_into(self._rx_buf)
+                self._handle_packet(self._rx_view[:nbytes], addr)
             except socket.timeout:
                 continue
             except Exception as e:
                 if self.running:
                     print(f"[Client] Receive error: {e}")
     
-    def _handle_packet(self, data: bytes, addr: Tuple[str, int]):
-        """Handle incoming packet."""
+    def _handle_packet(self, data, addr: Tuple[str, int]):
+        """Handle incoming packet (data may be a view of the receive buffer)."""
         try:
             plaintext = self.crypto.decrypt_packet(data)
             msg = Message.from_bytes(plaintext)
@@ -369,6 +373,9 @@ def main():
     
     args = parser.parse_args()
     
+    # Library modules log through logging; show their progress like prints
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     # Get or generate bootstrap key
     if args.bootstrap_key:
         import base64
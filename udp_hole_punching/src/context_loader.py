@@ -12,9 +12,10 @@ Implements OpenClaw-style "Agentic Loop" context assembly:
 
 import os
 import re
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from dataclasses import dataclass
 
 
@@ -46,6 +47,9 @@ class ContextLoader:
     PRIORITY_MEMORY = 70
     PRIORITY_SHORT_TERM = 10
     
+    # Core files checked for changes during revalidation
+    CORE_FILES = ("SOUL.md", "AGENTS.md", "USER.md", "MEMORY.md")
+    
     def __init__(self, context_dir: str):
         """
         Initialize context loader.
@@ -56,13 +60,39 @@ class ContextLoader:
         self.context_dir = Path(context_dir)
         self.context_files: List[ContextFile] = []
         
-    def load_all(self) -> str:
+        # Stale-while-revalidate cache
+        self._cached_prompt: Optional[str] = None
+        self._fingerprint: Optional[Tuple] = None
+        self._build_lock = threading.Lock()
+        self._revalidate_event = threading.Event()
+        # Started by the first cached load_all(); stopped by close()
+        self._bg_revalidator: Optional[threading.Thread] = None
+        self._bg_lock = threading.Lock()
+        self._closed = False
+        
+    def load_all(self, force: bool = False) -> str:
         """
         Load all context files and assemble into system prompt.
         
+        After the first load the cached prompt is returned immediately and
+        a background revalidation rebuilds it if any context file changed.
+        
+        Args:
+            force: Rebuild synchronously instead of returning the cached prompt
+        
         Returns:
             Assembled system prompt
         """
+        if self._cached_prompt is not None and not force:
+            if self._start_revalidator():
+                self._revalidate_event.set()
+            return self._cached_prompt
+        
+        with self._build_lock:
+            return self._build(self._scan_context_dir())
+    
+    def _build(self, fingerprint: Tuple) -> str:
+        """Read all context files and swap in the new prompt."""
         self.context_files = []
         
         # Load core files
@@ -78,7 +108,62 @@ class ContextLoader:
         self.context_files.sort(key=lambda x: x.priority, reverse=True)
         
         # Assemble into system prompt
-        return self._assemble_prompt()
+        prompt = self._assemble_prompt()
+        self._cached_prompt = prompt
+        self._fingerprint = fingerprint
+        return prompt
+    
+    def _scan_context_dir(self) -> Tuple:
+        """Fingerprint the context files by name, mtime and size."""
+        names = list(self.CORE_FILES)
+        for days_ago in range(2):  # Today and yesterday
+            date = datetime.now() - timedelta(days=days_ago)
+            names.append(f"memory/{date.strftime('%Y-%m-%d')}.md")
+        
+        fingerprint = []
+        for name in names:
+            try:
+                st = (self.context_dir / name).stat()
+                fingerprint.append((name, st.st_mtime_ns, st.st_size))
+            except OSError:
+                fingerprint.append((name, None, None))
+        return tuple(fingerprint)
+    
+    def _start_revalidator(self) -> bool:
+        """Start the background revalidation thread once; False after close()."""
+        with self._bg_lock:
+            if self._closed:
+                return False
+            if self._bg_revalidator is None:
+                self._bg_revalidator = threading.Thread(target=self._revalidate_loop, daemon=True)
+                self._bg_revalidator.start()
+            return True
+    
+    def close(self):
+        """Stop background revalidation; load_all() keeps serving the cache."""
+        with self._bg_lock:
+            self._closed = True
+            thread = self._bg_revalidator
+        self._revalidate_event.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+    
+    def _revalidate_loop(self):
+        """Rebuild the cached prompt in the background when files change."""
+        while True:
+            self._revalidate_event.wait()
+            self._revalidate_event.clear()
+            if self._closed:
+                return
+            try:
+                fingerprint = self._scan_context_dir()
+                if fingerprint == self._fingerprint:
+                    continue
+                with self._build_lock:
+                    if fingerprint != self._fingerprint:
+                        self._build(fingerprint)
+            except Exception as e:
+                print(f"[Context Loader] Revalidation failed: {e}")
     
     def _load_file(self, filename: str, priority: int) -> Optional[ContextFile]:
         """Load a single context file if it exists."""
@@ -188,7 +273,7 @@ class ContextLoader:
     def reload(self) -> str:
         """Reload all context files (useful for updates)."""
         print("[Context Loader] Reloading context files...")
-        return self.load_all()
+        return self.load_all(force=True)
 
 
 def create_default_context_files(context_dir: str):
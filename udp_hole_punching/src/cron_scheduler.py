@@ -11,13 +11,25 @@ import re
 import time
 import json
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field, asdict
 from typing import List, Optional, Callable, Dict
 import hashlib
 
 
+# Job field patterns; each is bounded to a single line so matching stays linear
+_SECTION_SPLIT_RE = re.compile(r'\n---+\n')
+_COMMAND_RE = re.compile(r'\*\*Command\*\*:\s*([^\n]+?)(?:\*\*|$)', re.MULTILINE | re.IGNORECASE)
+_NAME_RE = re.compile(r'^##\s+(.+)$', re.MULTILINE)
+_SCHEDULE_RE = re.compile(r'\*\*Schedule\*\*:\s*(.+?)$', re.MULTILINE | re.IGNORECASE)
+_ENABLED_RE = re.compile(r'\*\*Enabled\*\*:\s*(true|false)', re.IGNORECASE)
+
+# First line of free-form job context: non-blank, not a heading, no **markers**
+_CONTEXT_RE = re.compile(r'^(?!##)(?![^\n]*\*\*)[^\n]*\S', re.MULTILINE)
+
+
 @dataclass
 class CronJob:
     """Represents a single cron job."""
@@ -29,18 +41,27 @@ class CronJob:
     last_run: Optional[float] = None
     last_result: Optional[str] = None
     run_count: int = 0
+    _cached_dict: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+    _last_minute_key: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
     
     def to_dict(self) -> dict:
-        return {
-            'name': self.name,
-            'schedule': self.schedule,
-            'command': self.command,
-            'enabled': self.enabled,
-            'context': self.context,
-            'last_run': self.last_run,
-            'last_result': self.last_result,
-            'run_count': self.run_count
-        }
+        """Return the serialized job, reusing the cached dict until invalidated."""
+        if self._cached_dict is None:
+            self._cached_dict = {
+                'name': self.name,
+                'schedule': self.schedule,
+                'command': self.command,
+                'enabled': self.enabled,
+                'context': self.context,
+                'last_run': self.last_run,
+                'last_result': self.last_result,
+                'run_count': self.run_count
+            }
+        return self._cached_dict
+    
+    def invalidate_cache(self):
+        """Drop the cached dict after run state changes."""
+        self._cached_dict = None
 
 
 class CronParser:
@@ -56,7 +77,7 @@ class CronParser:
         jobs = []
         
         # Split by --- (job separator)
-        job_sections = re.split(r'\n---+\n', content)
+        job_sections = _SECTION_SPLIT_RE.split(content)
         
         for section in job_sections:
             section = section.strip()
@@ -73,40 +94,30 @@ class CronParser:
     def _parse_job(section: str) -> Optional[CronJob]:
         """Parse a single job section."""
         # Must have **Command** to be a valid job
-        command_match = re.search(r'\*\*Command\*\*:\s*(.+?)(?=\*\*|$)', section, re.MULTILINE | re.IGNORECASE | re.DOTALL)
+        command_match = _COMMAND_RE.search(section)
         if not command_match:
             return None  # Skip sections without Command (like documentation)
         
         command = command_match.group(1).strip()
         
         # Extract name (## Name)
-        name_match = re.search(r'^##\s+(.+)$', section, re.MULTILINE)
+        name_match = _NAME_RE.search(section)
         if not name_match:
             return None
         
         name = name_match.group(1).strip()
         
         # Extract schedule
-        schedule_match = re.search(r'\*\*Schedule\*\*:\s*(.+?)$', section, re.MULTILINE | re.IGNORECASE)
+        schedule_match = _SCHEDULE_RE.search(section)
         schedule = schedule_match.group(1).strip() if schedule_match else "0 0 * * *"
         
         # Extract enabled
-        enabled_match = re.search(r'\*\*Enabled\*\*:\s*(true|false)', section, re.MULTILINE | re.IGNORECASE)
+        enabled_match = _ENABLED_RE.search(section)
         enabled = enabled_match.group(1).lower() == 'true' if enabled_match else True
         
         # Extract context (remaining text after --- or before next section)
-        context = ""
-        lines = section.split('\n')
-        in_context = False
-        for line in lines:
-            if '**' in line and not in_context:
-                continue
-            if line.strip() and not line.startswith('##'):
-                in_context = True
-            if in_context:
-                context += line + '\n'
-        
-        context = context.strip()
+        context_match = _CONTEXT_RE.search(section)
+        context = section[context_match.start():].strip() if context_match else ""
         
         return CronJob(
             name=name,
@@ -149,10 +160,17 @@ class CronScheduler:
         self._file_hash: Optional[str] = None
         self._scheduler_thread: Optional[threading.Thread] = None
         self._watcher_thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.max_workers = 4  # concurrent manual job runs
         
         # Thread safety lock for file operations
         self._file_lock = threading.Lock()
         
+        # Monthly result log, kept open until the month rolls over
+        self._log_fh = None
+        self._log_month: Optional[str] = None
+        self._log_lock = threading.Lock()
+        
         # Callbacks
         self.on_job_execute: Optional[Callable[[CronJob], None]] = None
         self.on_job_complete: Optional[Callable[[CronJob, str], None]] = None
@@ -186,11 +204,12 @@ class CronScheduler:
             new_jobs = CronParser.parse(self.cron_file)
             
             # Preserve state for existing jobs
-            job_state = {j.name: (j.last_run, j.run_count) for j in self.jobs}
+            job_state = {j.name: (j.last_run, j.run_count, j._last_minute_key) for j in self.jobs}
             
             for job in new_jobs:
                 if job.name in job_state:
-                    job.last_run, job.run_count = job_state[job.name]
+                    job.last_run, job.run_count, job._last_minute_key = job_state[job.name]
+                    job.invalidate_cache()
             
             self.jobs = new_jobs
             self._file_mtime = current_mtime
@@ -244,6 +263,10 @@ class CronScheduler:
         
         self.running = True
         
+        # Worker pool for manually triggered jobs
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='cron-exec')
+        
         # Start file watcher
         self._watcher_thread = threading.Thread(target=self._watcher_loop, daemon=True)
         self._watcher_thread.start()
@@ -262,8 +285,12 @@ class CronScheduler:
             self._watcher_thread.join(timeout=1)
         if self._scheduler_thread:
             self._scheduler_thread.join(timeout=1)
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
         
         self._save_state()
+        self._close_log()
         print("[Cron] Scheduler stopped")
     
     def _watcher_loop(self):
@@ -322,16 +349,20 @@ class CronScheduler:
         
         # Check if already ran this minute
         if job.last_run:
-            last_run_dt = datetime.fromtimestamp(job.last_run)
-            if (last_run_dt.year == now.year and
-                last_run_dt.month == now.month and
-                last_run_dt.day == now.day and
-                last_run_dt.hour == now.hour and
-                last_run_dt.minute == now.minute):
+            if job._last_minute_key is None:
+                # last_run restored from a previous load; derive the key once
+                last_run_dt = datetime.fromtimestamp(job.last_run)
+                job._last_minute_key = self._minute_key(last_run_dt)
+            if job._last_minute_key == self._minute_key(now):
                 return False
         
         return True
     
+    @staticmethod
+    def _minute_key(dt: datetime) -> tuple:
+        """Key identifying the calendar minute of a datetime."""
+        return (dt.year, dt.month, dt.day, dt.hour, dt.minute)
+    
     def _match_field(self, pattern: str, value: int) -> bool:
         """Check if value matches cron pattern."""
         pattern = pattern.strip()
@@ -364,8 +395,11 @@ class CronScheduler:
         """Execute a cron job through LLM."""
         print(f"[Cron] Executing: {job.name}")
         
-        job.last_run = time.time()
+        now = datetime.now()
+        job.last_run = now.timestamp()
+        job._last_minute_key = self._minute_key(now)
         job.run_count += 1
+        job.invalidate_cache()
         
         if self.on_job_execute:
             self.on_job_execute(job)
@@ -386,12 +420,8 @@ Execute this task and provide a concise summary of what was done and any finding
             try:
                 self.llm_bridge.write(prompt)
                 
-                # Wait for response (with timeout)
-                response = None
-                for _ in range(120):  # 60 second timeout
-                    response = self.llm_bridge.read(timeout=0.5)
-                    if response:
-                        break
+                # Wait for response (read blocks on the output queue)
+                response = self.llm_bridge.read(timeout=60)
                 
                 if response:
                     job.last_result = response
@@ -412,16 +442,14 @@ Execute this task and provide a concise summary of what was done and any finding
         else:
             job.last_result = "[No LLM bridge available]"
         
+        job.invalidate_cache()
         self._save_state()
     
     def _log_result(self, job: CronJob, result: str):
         """Log cron job result to file."""
-        log_dir = Path('logs/cron')
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        log_file = log_dir / f"{datetime.now().strftime('%Y-%m')}.log"
-        
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        now = datetime.now()
+        month = now.strftime('%Y-%m')
+        timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
         log_entry = f"""
 [{timestamp}] {job.name}
 Command: {job.command}
@@ -429,13 +457,32 @@ Result: {result[:500]}{'...' if len(result) > 500 else ''}
 ---
 """
         
-        with open(log_file, 'a') as f:
-            f.write(log_entry)
+        with self._log_lock:
+            if month != self._log_month:
+                if self._log_fh:
+                    self._log_fh.close()
+                log_dir = Path('logs/cron')
+                log_dir.mkdir(parents=True, exist_ok=True)
+                self._log_fh = open(log_dir / f"{month}.log", 'a', buffering=1)
+                self._log_month = month
+            
+            self._log_fh.write(log_entry)
+    
+    def _close_log(self):
+        """Close the cached monthly log handle."""
+        with self._log_lock:
+            if self._log_fh:
+                self._log_fh.close()
+            self._log_fh = None
+            self._log_month = None
     
     # ============== API for Clients ==============
     
     def get_jobs(self) -> List[Dict]:
-        """Get list of all jobs (for API)."""
+        """Get list of all jobs (for API).
+        
+        Returned dicts are cached on each job and must not be mutated.
+        """
         return [j.to_dict() for j in self.jobs]
     
     def get_job(self, name: str) -> Optional[Dict]:
@@ -449,7 +496,9 @@ Result: {result[:500]}{'...' if len(result) > 500 else ''}
         """Manually trigger a job to run immediately."""
         for job in self.jobs:
             if job.name == name:
-                threading.Thread(target=self._execute_job, args=(job,), daemon=True).start()
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='cron-exec')
+                self._executor.submit(self._execute_job, job)
                 return True
         return False
     
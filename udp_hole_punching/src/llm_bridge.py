@@ -12,11 +12,27 @@ import json
 import time
 import queue
 import threading
+import itertools
+from collections import deque
 from pathlib import Path
+from types import MappingProxyType
 from dataclasses import dataclass, asdict
-from typing import Optional, List, Dict, Callable
+from typing import Optional, List, Dict, Callable, Deque
 from datetime import datetime
 
+try:
+    import orjson  # Optional: faster JSON for per-message history appends
+except ImportError:
+    orjson = None
+
+try:
+    # Imported up front so the first LLM turn does not pay for it
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
+
 
 @dataclass
 class Message:
@@ -37,24 +53,64 @@ class Message:
         }
 
 
+def _json_line(obj) -> bytes:
+    """Encode one history record as a JSON line (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj) + b'\n'
+    return json.dumps(obj).encode('utf-8') + b'\n'
+
+
+def _json_document(obj) -> bytes:
+    """Encode the session metadata file, indented (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode('utf-8')
+
+
+def _json_loads(data: bytes):
+    """Decode one history record or the metadata file (orjson when available)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _iter_sse(response):
+    """Yield the decoded JSON data of each server-sent event until [DONE]."""
+    for line in response.iter_lines():
+        if not line.startswith(b'data:'):
+            continue  # Blank separators, 'event:' lines, comments
+        data = line[5:].strip()
+        if data == b'[DONE]':
+            return
+        yield _json_loads(data)
+
+
 class LLMConfig:
     """Configuration for LLM provider."""
     
+    # 'api' selects the wire format: 'chat_completions' for
+    # OpenAI-compatible endpoints, 'anthropic' for the Messages API
     PROVIDERS = {
         'deepseek': {
             'api_base': 'https://api.deepseek.com/v1',
             'model': 'deepseek-chat',
-            'api_key_env': 'DEEPSEEK_API_KEY'
+            'api_key_env': 'DEEPSEEK_API_KEY',
+            'label': 'DeepSeek',
+            'api': 'chat_completions'
         },
         'openai': {
             'api_base': 'https://api.openai.com/v1',
             'model': 'gpt-3.5-turbo',
-            'api_key_env': 'OPENAI_API_KEY'
+            'api_key_env': 'OPENAI_API_KEY',
+            'label': 'OpenAI',
+            'api': 'chat_completions'
         },
         'anthropic': {
             'api_base': 'https://api.anthropic.com/v1',
             'model': 'claude-3-haiku-20240307',
-            'api_key_env': 'ANTHROPIC_API_KEY'
+            'api_key_env': 'ANTHROPIC_API_KEY',
+            'label': 'Anthropic',
+            'api': 'anthropic'
         }
     }
     
@@ -66,10 +122,23 @@ class LLMConfig:
         config = self.PROVIDERS[self.provider]
         self.api_base = config['api_base']
         self.model = config['model']
+        self.label = config['label']
+        self.api = config['api']
         self.api_key = os.environ.get(config['api_key_env'])
         
         if not self.api_key:
             print(f"Warning: {config['api_key_env']} not set")
+        
+        # Request headers, built once (read-only; copied onto the HTTP session)
+        if self.api == 'anthropic':
+            headers = {
+                'x-api-key': self.api_key,
+                'anthropic-version': '2023-06-01'
+            }
+        else:
+            headers = {'Authorization': f'Bearer {self.api_key}'}
+        headers['Content-Type'] = 'application/json'
+        self.headers = MappingProxyType(headers)
 
 
 class LLMBridge:
@@ -86,81 +155,203 @@ class LLMBridge:
         
         Args:
             config: LLM configuration (default: DeepSeek)
-            save_file: Path to save/load conversation history
+            save_file: Path to save/load session metadata; messages go to
+                the sibling .jsonl file (e.g. llm_session.jsonl)
         """
         self.config = config or LLMConfig('deepseek')
         self.save_file = save_file or 'llm_session.json'
+        self.history_file = str(Path(self.save_file).with_suffix('.jsonl'))
         
-        # Conversation history
-        self.messages: List[Message] = []
+        # Conversation history: user/assistant turns only, newest
+        # max_history kept in memory; the system prompt lives in
+        # system_prompt alone
+        self.max_history = 2000
+        self.messages: Deque[Message] = deque(maxlen=self.max_history)
         self.system_prompt: Optional[str] = None
         
-        # Input/output queues for stdin/stdout style interface
-        self.input_queue: queue.Queue[str] = queue.Queue()
-        self.output_queue: queue.Queue[str] = queue.Queue()
+        # API-shape dicts for the newest context_messages turns, appended
+        # as messages are added so each LLM call reuses them
+        self.context_messages = 20
+        self._api_ctx: Deque[dict] = deque(maxlen=self.context_messages)
+        
+        # Input/output queues for stdin/stdout style interface (SimpleQueue:
+        # one producer and one consumer each, no task tracking needed)
+        self.input_queue: queue.SimpleQueue[str] = queue.SimpleQueue()
+        self.output_queue: queue.SimpleQueue[str] = queue.SimpleQueue()
         
         # State
         self.running = False
         self.processing = False
         self.session_thread: Optional[threading.Thread] = None
         
+        # HTTP session reused across API calls (created by _http on first use)
+        self._http_session = None
+        
+        # Called (processing thread) with each piece of a streamed response
+        # as it arrives; the full response still goes to output_queue
+        self.delta_callback: Optional[Callable[[str], None]] = None
+        
+        # History writes for the writer thread (started by start())
+        self._persist_q: queue.Queue = queue.Queue()
+        self._persist_thread: Optional[threading.Thread] = None
+        
         # Load existing session
         self.load_session()
     
     def load_session(self):
-        """Load conversation history from file."""
+        """
+        Load conversation history from file.
+        
+        Messages are read line by line from history_file. A save_file that
+        still holds a 'messages' list (the old single-JSON format) is
+        migrated to the split layout.
+        """
+        legacy_messages = None
         if os.path.exists(self.save_file):
             try:
-                with open(self.save_file, 'r') as f:
-                    data = json.load(f)
-                    
-                self.messages = [Message(**m) for m in data.get('messages', [])]
-                self.system_prompt = data.get('system_prompt')
+                with open(self.save_file, 'rb') as f:
+                    data = _json_loads(f.read())
                 
-                print(f"[LLM Bridge] Loaded {len(self.messages)} messages from {self.save_file}")
+                self.system_prompt = data.get('system_prompt')
+                legacy_messages = data.get('messages')
             except Exception as e:
                 print(f"[LLM Bridge] Failed to load session: {e}")
+        
+        try:
+            if os.path.exists(self.history_file):
+                with open(self.history_file, 'rb') as f:
+                    records = (_json_loads(line) for line in f if line.strip())
+                    self.messages.extend(Message(**m) for m in records if m['role'] != 'system')
+            elif legacy_messages:
+                self.messages.extend(Message(**m) for m in legacy_messages if m['role'] != 'system')
+                self._rewrite_history()
+                self.save_session()
+            else:
+                return
+            
+            self._rebuild_api_ctx()
+            print(f"[LLM Bridge] Loaded {len(self.messages)} messages from {self.history_file}")
+        except Exception as e:
+            print(f"[LLM Bridge] Failed to load history: {e}")
     
     def save_session(self):
-        """Save conversation history to file."""
+        """Save session metadata (system prompt); messages are appended as they come."""
         try:
             data = {
-                'messages': [m.to_dict() for m in self.messages],
                 'system_prompt': self.system_prompt,
                 'last_saved': time.time()
             }
             
-            with open(self.save_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            with open(self.save_file, 'wb') as f:
+                f.write(_json_document(data))
                 
         except Exception as e:
             print(f"[LLM Bridge] Failed to save session: {e}")
     
+    def _append_history(self, msg: Message):
+        """Persist one new message (queued to the writer thread when running)."""
+        self._persist(msg)
+    
+    def _rewrite_history(self):
+        """Persist the whole of self.messages (after removing messages)."""
+        # Snapshot now; queued appends before it are included in it
+        self._persist(list(self.messages))
+    
+    def _persist(self, item):
+        """Hand a history write to the writer thread, or do it inline if not started."""
+        if self._persist_thread is not None:
+            self._persist_q.put(item)
+        else:
+            self._write_history([item])
+    
+    def _persist_loop(self):
+        """
+        History writer thread.
+        
+        Blocks for the next write, then takes whatever else is already
+        queued (up to 100 items) so a burst of turns costs one file write.
+        Stops at the None sentinel queued by stop().
+        """
+        while True:
+            items = [self._persist_q.get()]
+            while len(items) < 100:
+                try:
+                    items.append(self._persist_q.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = None in items
+            self._write_history([item for item in items if item is not None])
+            if stop:
+                return
+    
+    def _write_history(self, items: list):
+        """
+        Apply history writes in order.
+        
+        A Message is appended to history_file as one JSON line (runs of
+        them in one write); a list of messages replaces the file.
+        """
+        pending = []  # encoded appends not yet written
+        try:
+            for item in items:
+                if isinstance(item, Message):
+                    pending.append(_json_line(item.to_dict()))
+                    continue
+                
+                # Full rewrite supersedes earlier appends in this batch
+                pending.clear()
+                tmp = self.history_file + '.tmp'
+                with open(tmp, 'wb') as f:
+                    f.write(b''.join(_json_line(m.to_dict()) for m in item))
+                os.replace(tmp, self.history_file)
+            
+            if pending:
+                with open(self.history_file, 'ab') as f:
+                    f.write(b''.join(pending))
+        except Exception as e:
+            print(f"[LLM Bridge] Failed to save history: {e}")
+    
     def set_system_prompt(self, prompt: str):
         """Set system prompt for the conversation."""
+        # Not part of messages; get_context_window prepends it
         self.system_prompt = prompt
-        # Remove old system message if exists
-        self.messages = [m for m in self.messages if m.role != 'system']
-        # Add new system message
-        self.messages.insert(0, Message(role='system', content=prompt))
         self.save_session()
     
     def add_message(self, role: str, content: str):
-        """Add a message to history."""
-        self.messages.append(Message(role=role, content=content))
-        self.save_session()
-    
-    def get_context_window(self, max_messages: int = 20) -> List[dict]:
-        """Get recent messages for API context."""
+        """Add a message to history (appended to disk, not a full rewrite)."""
+        msg = Message(role=role, content=content)
+        self.messages.append(msg)
+        self._api_ctx.append({'role': role, 'content': content})
+        self._append_history(msg)
+    
+    def _rebuild_api_ctx(self):
+        """Refill _api_ctx from the newest messages (after load or clear)."""
+        self._api_ctx.clear()
+        # extendleft while walking back from the newest keeps oldest first
+        self._api_ctx.extendleft(
+            {'role': msg.role, 'content': msg.content}
+            for msg in itertools.islice(reversed(self.messages), self._api_ctx.maxlen)
+        )
+    
+    def get_context_window(self, max_messages: Optional[int] = None) -> List[dict]:
+        """
+        Get recent messages for API context.
+        
+        The default window (context_messages) reuses the dicts kept in
+        _api_ctx; they are shared, so callers must not modify them.
+        """
         # Always include system prompt if set
         context = []
         if self.system_prompt:
             context.append({'role': 'system', 'content': self.system_prompt})
         
-        # Add recent messages
-        recent = self.messages[-max_messages:] if len(self.messages) > max_messages else self.messages
-        for msg in recent:
-            if msg.role != 'system':  # Skip system messages (we added it above)
+        if max_messages is None or max_messages == self._api_ctx.maxlen:
+            context.extend(self._api_ctx)
+        else:
+            # Walk back from the newest, O(max_messages)
+            recent = list(itertools.islice(reversed(self.messages), max_messages))
+            for msg in reversed(recent):
                 context.append({'role': msg.role, 'content': msg.content})
         
         return context
@@ -178,129 +369,139 @@ class LLMBridge:
         # Add user message to history
         self.add_message('user', user_message)
         
-        # Call LLM API based on provider
-        if self.config.provider == 'deepseek':
-            response = self._call_deepseek(user_message)
-        elif self.config.provider == 'openai':
-            response = self._call_openai(user_message)
-        elif self.config.provider == 'anthropic':
-            response = self._call_anthropic(user_message)
+        # Call LLM API in the provider's wire format
+        if self.config.api == 'anthropic':
+            response = self._call_anthropic()
         else:
-            response = f"[Error: Unknown provider {self.config.provider}]"
+            response = self._call_chat_completions()
         
         # Add assistant response to history
         self.add_message('assistant', response)
         
         return response
     
-    def _call_deepseek(self, user_message: str) -> str:
-        """Call DeepSeek API."""
-        try:
-            import requests
-            
-            headers = {
-                'Authorization': f'Bearer {self.config.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            data = {
-                'model': self.config.model,
-                'messages': self.get_context_window(),
-                'stream': False
-            }
+    def _http(self):
+        """
+        Get the HTTP session for API calls.
+        
+        One requests.Session per bridge keeps the TCP+TLS connection to the
+        provider alive between turns, retries transient failures, and
+        carries the provider's auth headers, so calls only add the body.
+        """
+        if self._http_session is None:
+            if requests is None:
+                raise ImportError("requests is required for LLM API calls (pip install requests)")
             
-            response = requests.post(
-                f'{self.config.api_base}/chat/completions',
-                headers=headers,
-                json=data,
-                timeout=60
+            session = requests.Session()
+            # Completions are non-idempotent POSTs: retry only where the
+            # provider cannot have run the request (no connection, or a
+            # 429 rate limit), never after a 5xx or a dropped response
+            retry = Retry(
+                total=2,
+                connect=2,
+                read=0,
+                status=2,
+                backoff_factor=0.3,
+                status_forcelist=[429],
+                allowed_methods=frozenset({'POST'}),  # Needed for the 429 retries
+                respect_retry_after_header=True,
+                raise_on_status=False  # Hand the last response to the caller
             )
+            session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry))
             
-            if response.status_code == 200:
-                result = response.json()
-                return result['choices'][0]['message']['content']
-            else:
-                return f"[Error: DeepSeek API returned {response.status_code}: {response.text}]"
-                
-        except Exception as e:
-            return f"[Error calling DeepSeek: {e}]"
+            session.headers.update(self.config.headers)
+            
+            self._http_session = session
+        return self._http_session
     
-    def _call_openai(self, user_message: str) -> str:
-        """Call OpenAI API."""
+    def _call_chat_completions(self) -> str:
+        """
+        Call an OpenAI-compatible /chat/completions endpoint (DeepSeek,
+        OpenAI), streaming.
+        
+        Tokens are passed to delta_callback as they arrive; the joined
+        text is returned as the complete response.
+        """
+        label = self.config.label
         try:
-            import requests
-            
-            headers = {
-                'Authorization': f'Bearer {self.config.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
             data = {
                 'model': self.config.model,
                 'messages': self.get_context_window(),
-                'stream': False
+                'stream': True
             }
             
-            response = requests.post(
+            with self._http().post(
                 f'{self.config.api_base}/chat/completions',
-                headers=headers,
                 json=data,
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result['choices'][0]['message']['content']
-            else:
-                return f"[Error: OpenAI API returned {response.status_code}: {response.text}]"
+                timeout=60,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    return f"[Error: {label} API returned {response.status_code}: {response.text}]"
+                
+                parts = []
+                for event in _iter_sse(response):
+                    choices = event.get('choices') or [{}]
+                    text = choices[0].get('delta', {}).get('content')
+                    if text:
+                        parts.append(text)
+                        self._emit_delta(text)
+                if not parts:
+                    return f"[Error: {label} API returned an empty response]"
+                return ''.join(parts)
                 
         except Exception as e:
-            return f"[Error calling OpenAI: {e}]"
+            return f"[Error calling {label}: {e}]"
     
-    def _call_anthropic(self, user_message: str) -> str:
-        """Call Anthropic Claude API."""
+    def _call_anthropic(self) -> str:
+        """Call Anthropic Claude API (streaming, see _call_chat_completions)."""
         try:
-            import requests
-            
-            headers = {
-                'x-api-key': self.config.api_key,
-                'Content-Type': 'application/json',
-                'anthropic-version': '2023-06-01'
-            }
-            
-            # Anthropic uses different format
-            messages = []
-            system = None
-            for msg in self.get_context_window():
-                if msg['role'] == 'system':
-                    system = msg['content']
-                else:
-                    messages.append(msg)
+            # Anthropic takes the system prompt as a separate field
+            system = self.system_prompt
             
             data = {
                 'model': self.config.model,
-                'messages': messages,
-                'max_tokens': 1024
+                'messages': list(self._api_ctx),
+                'max_tokens': 1024,
+                'stream': True
             }
             if system:
                 data['system'] = system
             
-            response = requests.post(
+            with self._http().post(
                 f'{self.config.api_base}/messages',
-                headers=headers,
                 json=data,
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result['content'][0]['text']
-            else:
-                return f"[Error: Anthropic API returned {response.status_code}: {response.text}]"
+                timeout=60,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    return f"[Error: Anthropic API returned {response.status_code}: {response.text}]"
+                
+                parts = []
+                for event in _iter_sse(response):
+                    if event.get('type') == 'content_block_delta':
+                        text = event.get('delta', {}).get('text')
+                        if text:
+                            parts.append(text)
+                            self._emit_delta(text)
+                    elif event.get('type') == 'error':
+                        return f"[Error: Anthropic API stream error: {event.get('error')}]"
+                if not parts:
+                    return "[Error: Anthropic API returned an empty response]"
+                return ''.join(parts)
                 
         except Exception as e:
             return f"[Error calling Anthropic: {e}]"
     
+    def _emit_delta(self, text: str):
+        """Pass a streamed piece of the response to delta_callback, if set."""
+        callback = self.delta_callback
+        if callback is not None:
+            try:
+                callback(text)
+            except Exception as e:
+                print(f"[LLM Bridge] Delta callback error: {e}")
+    
     # ============== Stdin/Stdout Interface ==============
     
     def write(self, text: str):
@@ -324,11 +525,13 @@ class LLMBridge:
     # ============== Session Management ==============
     
     def start(self):
-        """Start the background processing thread."""
+        """Start the background processing and history writer threads."""
         if self.running:
             return
         
         self.running = True
+        self._persist_thread = threading.Thread(target=self._persist_loop, daemon=True)
+        self._persist_thread.start()
         self.session_thread = threading.Thread(target=self._process_loop, daemon=True)
         self.session_thread.start()
         print(f"[LLM Bridge] Started with {self.config.provider} provider")
@@ -337,16 +540,28 @@ class LLMBridge:
         """Stop the background processing."""
         self.running = False
         if self.session_thread:
+            # Wake the processing loop out of its blocking get
+            self.input_queue.put(None)
             self.session_thread.join(timeout=2)
+        if self._persist_thread is not None:
+            # Flush queued history writes, then fall back to inline writes
+            self._persist_q.put(None)
+            self._persist_thread.join()
+            self._persist_thread = None
         self.save_session()
+        if self._http_session is not None:
+            self._http_session.close()
+            self._http_session = None
         print("[LLM Bridge] Stopped")
     
     def _process_loop(self):
-        """Background processing loop."""
+        """Background processing loop (parked in a blocking get while idle)."""
         while self.running:
             try:
-                # Wait for input
-                user_input = self.input_queue.get(timeout=0.5)
+                # Wait for input; None from stop() ends the loop
+                user_input = self.input_queue.get()
+                if user_input is None or not self.running:
+                    break
                 
                 # Mark as processing
                 self.processing = True
@@ -359,8 +574,6 @@ class LLMBridge:
                 
                 self.processing = False
                 
-            except queue.Empty:
-                continue
             except Exception as e:
                 print(f"[LLM Bridge] Processing error: {e}")
                 self.processing = False
@@ -371,13 +584,13 @@ class LLMBridge:
     
     def get_history(self) -> List[Message]:
         """Get full conversation history."""
-        return self.messages.copy()
+        return list(self.messages)
     
     def clear_history(self):
         """Clear conversation history."""
-        self.messages = []
-        if self.system_prompt:
-            self.messages.append(Message(role='system', content=self.system_prompt))
+        self.messages.clear()
+        self._api_ctx.clear()
+        self._rewrite_history()
         self.save_session()
 
 
@@ -400,6 +613,13 @@ def main():
     # Create bridge
     bridge = LLMBridge(config, args.save_file)
     bridge.set_system_prompt(args.system_prompt)
+    
+    # Print tokens as they stream in
+    streamed = []
+    def print_delta(text):
+        streamed.append(text)
+        print(text, end='', flush=True)
+    bridge.delta_callback = print_delta
     bridge.start()
     
     print("="*60)
@@ -436,6 +656,7 @@ def main():
                 continue
             
             # Send to LLM
+            streamed.clear()
             bridge.write(user_input)
             print("Assistant: ", end='', flush=True)
             
@@ -443,7 +664,10 @@ def main():
             while True:
                 response = bridge.read(timeout=0.1)
                 if response:
-                    print(response)
+                    if streamed:
+                        print()  # Already printed token by token
+                    else:
+                        print(response)  # e.g. an error, nothing streamed
                     break
                 if not bridge.is_processing() and bridge.input_queue.empty():
                     # No response and not processing
@@ -1,13 +1,19 @@
 """Networking module for UDP hole punching."""
 
-from .udp_hole_punch import UDPHolePuncher, HolePunchResult
-from .nat_detection import NATDetector, NATType
+from .udp_hole_punch import UDPHolePuncher, HolePunchResult, punch_concurrently
+from .nat_detection import NATDetector, NATType, Strategy
 from .stun_client import STUNClient
+from .batch_send import send_batch
+from .batch_recv import RecvBatch
 
 __all__ = [
     'UDPHolePuncher',
     'HolePunchResult',
+    'punch_concurrently',
     'NATDetector',
     'NATType',
+    'Strategy',
     'STUNClient',
+    'send_batch',
+    'RecvBatch',
 ]
@@ -0,0 +1,147 @@
+"""
+Batched UDP receives for ClawChat.
+
+Receives every queued datagram (up to a batch size) with a single
+recvmmsg(2) call on Linux, into buffers allocated once. Like sendmmsg,
+recvmmsg has no stdlib wrapper and goes through ctypes; other platforms
+(and any ctypes failure) fall back to a non-blocking recvfrom_into loop.
+"""
+
+import os
+import errno
+import ctypes
+import ctypes.util
+import socket
+import sys
+from typing import List, Tuple
+
+from .batch_send import _IOVec, _MMsgHdr, _SockAddrIn
+
+
+def _load_recvmmsg():
+    """Return libc's recvmmsg, or None where it is unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        func = libc.recvmmsg
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+    func.restype = ctypes.c_int
+    return func
+
+
+_recvmmsg = _load_recvmmsg()
+
+
+class RecvBatch:
+    """
+    Reusable receive buffers for draining a UDP socket in batches.
+
+    The buffers and the recvmmsg header array are built once; each recv()
+    call only fills them in, so receiving allocates nothing per datagram
+    beyond the returned views.
+    """
+
+    def __init__(self, count: int = 16, size: int = 65535, addresses: bool = False):
+        """
+        Args:
+            count: Most datagrams returned per recv() call
+            size: Buffer size per datagram (65535 fits any UDP payload)
+            addresses: Also capture each sender's IPv4 address, for recvfrom()
+        """
+        self.count = count
+        self._bufs = [bytearray(size) for _ in range(count)]
+        self._views = [memoryview(buf) for buf in self._bufs]
+
+        self._iovs = (_IOVec * count)()
+        self._msgs = (_MMsgHdr * count)()
+        # ctypes views of the bytearrays, so the kernel writes into them
+        self._c_bufs = [(ctypes.c_char * size).from_buffer(buf) for buf in self._bufs]
+        for i, c_buf in enumerate(self._c_bufs):
+            self._iovs[i].iov_base = ctypes.addressof(c_buf)
+            self._iovs[i].iov_len = size
+            hdr = self._msgs[i].msg_hdr
+            hdr.msg_iov = ctypes.pointer(self._iovs[i])
+            hdr.msg_iovlen = 1  # msg_name stays NULL unless addresses requested
+
+        self._names = None
+        if addresses:
+            self._names = (_SockAddrIn * count)()
+            for i in range(count):
+                hdr = self._msgs[i].msg_hdr
+                hdr.msg_name = ctypes.addressof(self._names[i])
+                hdr.msg_namelen = ctypes.sizeof(_SockAddrIn)
+
+    def recv(self, sock: socket.socket) -> List[memoryview]:
+        """
+        Receive every datagram queued on a non-blocking socket, up to count.
+
+        Returns:
+            Views of the received datagrams, valid until the next recv();
+            empty when nothing is queued
+        """
+        if _recvmmsg is None:
+            return self._recv_loop(sock)
+
+        n = _recvmmsg(sock.fileno(), ctypes.addressof(self._msgs), self.count,
+                      socket.MSG_DONTWAIT, None)
+        if n < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return []
+            raise OSError(err, os.strerror(err))
+
+        msgs, views = self._msgs, self._views
+        return [views[i][:msgs[i].msg_len] for i in range(n)]
+
+    def recvfrom(self, sock: socket.socket) -> List[Tuple[memoryview, Tuple[str, int]]]:
+        """
+        Like recv(), but pair each datagram with its sender's address.
+
+        Needs addresses=True and an IPv4 socket for the recvmmsg path;
+        anything else falls back to a recvfrom_into loop.
+        """
+        if _recvmmsg is None or self._names is None or sock.family != socket.AF_INET:
+            return self._recvfrom_loop(sock)
+
+        n = _recvmmsg(sock.fileno(), ctypes.addressof(self._msgs), self.count,
+                      socket.MSG_DONTWAIT, None)
+        if n < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return []
+            raise OSError(err, os.strerror(err))
+
+        msgs, views, names = self._msgs, self._views, self._names
+        namelen = ctypes.sizeof(_SockAddrIn)
+        datagrams = []
+        for i in range(n):
+            name = names[i]
+            addr = (socket.inet_ntoa(bytes(name.sin_addr)), socket.ntohs(name.sin_port))
+            datagrams.append((views[i][:msgs[i].msg_len], addr))
+            msgs[i].msg_hdr.msg_namelen = namelen  # The kernel shrinks it on return
+        return datagrams
+
+    def _recv_loop(self, sock: socket.socket) -> List[memoryview]:
+        """recvfrom_into fallback: one syscall per datagram."""
+        datagrams = []
+        for view in self._views:
+            try:
+                nbytes, _ = sock.recvfrom_into(view)
+            except BlockingIOError:
+                break
+            datagrams.append(view[:nbytes])
+        return datagrams
+
+    def _recvfrom_loop(self, sock: socket.socket) -> List[Tuple[memoryview, Tuple[str, int]]]:
+        """recvfrom_into fallback for recvfrom()."""
+        datagrams = []
+        for view in self._views:
+            try:
+                nbytes, addr = sock.recvfrom_into(view)
+            except BlockingIOError:
+                break
+            datagrams.append((view[:nbytes], addr))
+        return datagrams
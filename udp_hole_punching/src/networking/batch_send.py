@@ -0,0 +1,159 @@
+"""
+Batched UDP sends for ClawChat.
+
+Sends many datagrams to one address with a single sendmmsg(2) call on
+Linux. Python has no stdlib wrapper, so the call goes through ctypes;
+other platforms (and any ctypes failure) fall back to a sendto loop.
+"""
+
+import os
+import errno
+import ctypes
+import ctypes.util
+import functools
+import select
+import socket
+import sys
+import time
+from typing import List, Tuple
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [
+        ('iov_base', ctypes.c_void_p),
+        ('iov_len', ctypes.c_size_t),
+    ]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.POINTER(_IOVec)),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_hdr', _MsgHdr),
+        ('msg_len', ctypes.c_uint),
+    ]
+
+
+class _SockAddrIn(ctypes.Structure):
+    _fields_ = [
+        ('sin_family', ctypes.c_ushort),
+        ('sin_port', ctypes.c_uint16),   # network byte order
+        ('sin_addr', ctypes.c_uint8 * 4),
+        ('sin_zero', ctypes.c_uint8 * 8),
+    ]
+
+
+def _load_sendmmsg():
+    """Return libc's sendmmsg, or None where it is unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        func = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    func.restype = ctypes.c_int
+    return func
+
+
+_sendmmsg = _load_sendmmsg()
+
+# Longest wait for send-buffer space when the socket has no timeout of
+# its own (blocking or non-blocking)
+_SEND_WAIT = 5.0
+
+
+@functools.lru_cache(maxsize=64)
+def _sockaddr_in(host: str, port: int) -> _SockAddrIn:
+    """
+    Build a sockaddr_in for an IPv4 (host, port).
+
+    Cached: a transfer sends every batch to the same address, so the
+    host is resolved once rather than once per call. The result is
+    shared and must not be modified.
+    """
+    sa = _SockAddrIn()
+    sa.sin_family = socket.AF_INET
+    sa.sin_port = socket.htons(port)
+    sa.sin_addr[:] = socket.inet_aton(socket.gethostbyname(host))
+    return sa
+
+
+def send_batch(sock: socket.socket, datagrams: List[bytes], address: Tuple[str, int]) -> int:
+    """
+    Send each buffer in datagrams as its own datagram to address.
+
+    Uses one sendmmsg(2) call per batch where available (IPv4 sockets on
+    Linux), otherwise one sendto per datagram. When the send buffer is
+    full it waits for space for at most the socket timeout (or
+    _SEND_WAIT if the socket has none).
+
+    Returns:
+        Number of datagrams sent
+
+    Raises:
+        socket.timeout: The send buffer stayed full past the wait
+    """
+    if not datagrams:
+        return 0
+
+    if _sendmmsg is None or sock.family != socket.AF_INET:
+        for data in datagrams:
+            sock.sendto(data, address)
+        return len(datagrams)
+
+    count = len(datagrams)
+    addr = _sockaddr_in(*address)
+    addr_ptr = ctypes.addressof(addr)
+    addr_len = ctypes.sizeof(addr)
+    iovs = (_IOVec * count)()
+    msgs = (_MMsgHdr * count)()
+    # c_char_p points at each bytes object's own buffer, so bytes go
+    # through as they are; only other buffer types are copied. Keep the
+    # references alive until the call returns
+    keep = [data if type(data) is bytes else bytes(data) for data in datagrams]
+
+    for i, data in enumerate(keep):
+        iovs[i].iov_base = ctypes.cast(ctypes.c_char_p(data), ctypes.c_void_p)
+        iovs[i].iov_len = len(data)
+        hdr = msgs[i].msg_hdr
+        hdr.msg_name = addr_ptr
+        hdr.msg_namelen = addr_len
+        hdr.msg_iov = ctypes.pointer(iovs[i])
+        hdr.msg_iovlen = 1
+
+    sent = 0
+    fd = sock.fileno()
+    base = ctypes.addressof(msgs)
+    deadline = None
+    while sent < count:
+        # sendmmsg may send fewer than requested; resume from the first unsent
+        n = _sendmmsg(fd, base + sent * ctypes.sizeof(_MMsgHdr), count - sent, 0)
+        if n < 0:
+            err = ctypes.get_errno()
+            if err == errno.EINTR:
+                continue
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK):
+                # Full send buffer: wait for space, but not forever
+                if deadline is None:
+                    deadline = time.monotonic() + (sock.gettimeout() or _SEND_WAIT)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout(f"send_batch timed out after {sent} of {count} datagrams")
+                select.select([], [sock], [], remaining)
+                continue
+            raise OSError(err, os.strerror(err))
+        sent += n
+
+    return sent
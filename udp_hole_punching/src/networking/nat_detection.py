@@ -6,7 +6,8 @@ Detects NAT type to determine hole punching strategy.
 
 import enum
 import socket
-from typing import Optional, Tuple
+import time
+from typing import NamedTuple, Optional, Tuple
 from .stun_client import STUNClient
 
 
@@ -21,6 +22,71 @@ class NATType(enum.Enum):
     BLOCKED = "blocked"  # STUN failed
 
 
+class Strategy(NamedTuple):
+    """Hole punching recommendations for one NAT type."""
+    description: str
+    simultaneous: bool
+    timeout: int
+    retries: int
+    success_rate: float
+    turn_fallback: bool = False
+
+
+# Built once; get_hole_punch_strategy hands out these shared records
+_STRATEGY_TABLE = {
+    NATType.UNKNOWN: Strategy(
+        description="Unknown NAT type",
+        simultaneous=True,
+        timeout=60,
+        retries=15,
+        success_rate=0.70
+    ),
+    NATType.OPEN: Strategy(
+        description="Direct connection possible",
+        simultaneous=False,
+        timeout=10,
+        retries=3,
+        success_rate=1.0
+    ),
+    NATType.FULL_CONE: Strategy(
+        description="Easy hole punching",
+        simultaneous=True,
+        timeout=15,
+        retries=5,
+        success_rate=0.95
+    ),
+    NATType.RESTRICTED_CONE: Strategy(
+        description="Standard hole punching",
+        simultaneous=True,
+        timeout=30,
+        retries=10,
+        success_rate=0.90
+    ),
+    NATType.PORT_RESTRICTED: Strategy(
+        description="Requires precise timing",
+        simultaneous=True,
+        timeout=45,
+        retries=15,
+        success_rate=0.85
+    ),
+    NATType.SYMMETRIC: Strategy(
+        description="Difficult, may need TURN",
+        simultaneous=True,
+        timeout=60,
+        retries=20,
+        success_rate=0.40,
+        turn_fallback=True
+    ),
+    NATType.BLOCKED: Strategy(
+        description="Connection blocked",
+        simultaneous=False,
+        timeout=0,
+        retries=0,
+        success_rate=0.0
+    ),
+}
+
+
 class NATDetector:
     """
     Detects NAT type using STUN.
@@ -28,6 +94,11 @@ class NATDetector:
     Based on RFC 5780 NAT Behavior Discovery.
     """
     
+    # Seconds a local address enumeration is reused
+    LOCAL_ADDR_TTL = 60.0
+    # (expiry, addresses) shared by all detectors
+    _LOCAL_ADDR_CACHE: Optional[Tuple[float, list]] = None
+    
     def __init__(self, timeout: float = 5.0):
         """
         Initialize NAT detector.
@@ -72,30 +143,54 @@ class NATDetector:
         return NATType.RESTRICTED_CONE
     
     def _get_local_addresses(self) -> list:
-        """Get local IP addresses."""
+        """
+        Get local IP addresses.
+        
+        Memoized at class level for LOCAL_ADDR_TTL seconds: interface
+        enumeration does not change between detections, and a hostname
+        lookup can stall on DNS.
+        """
+        cache = NATDetector._LOCAL_ADDR_CACHE
+        now = time.monotonic()
+        if cache and cache[0] > now:
+            return list(cache[1])
+        
         addresses = ["127.0.0.1"]
         
         try:
-            # Get hostname's IP
-            hostname = socket.gethostname()
-            host_ip = socket.gethostbyname(hostname)
-            addresses.append(host_ip)
-            
-            # Try to get all interfaces
-            import subprocess
-            result = subprocess.run(
-                ["hostname", "-I"],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                for ip in result.stdout.strip().split():
-                    if ip not in addresses:
-                        addresses.append(ip)
-        except Exception:
-            pass
-        
-        return addresses
+            import psutil
+        except ImportError:
+            psutil = None
+        
+        if psutil is not None:
+            for iface_addrs in psutil.net_if_addrs().values():
+                for addr in iface_addrs:
+                    if addr.family == socket.AF_INET and addr.address not in addresses:
+                        addresses.append(addr.address)
+        else:
+            try:
+                # Hostname addresses (served from /etc/hosts on most systems)
+                for info in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET):
+                    if info[4][0] not in addresses:
+                        addresses.append(info[4][0])
+            except OSError:
+                pass
+        
+            # Address of the default-route interface: connecting a UDP
+            # socket only selects a source address, nothing is sent
+            probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                probe.connect(("192.0.2.1", 9))
+                route_ip = probe.getsockname()[0]
+                if route_ip not in addresses:
+                    addresses.append(route_ip)
+            except OSError:
+                pass
+            finally:
+                probe.close()
+        
+        NATDetector._LOCAL_ADDR_CACHE = (now + self.LOCAL_ADDR_TTL, addresses)
+        return list(addresses)
     
     def _check_mapping_consistency(self) -> str:
         """
@@ -104,17 +199,14 @@ class NATDetector:
         Returns:
             "consistent" or "symmetric"
         """
-        # Get mapping from first STUN server
-        addr1 = self.stun_client.get_public_address()
-        if not addr1:
-            return "blocked"
-        
-        # Create new socket and get mapping again
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.settimeout(self.timeout)
+        # Probe the mapping of two sockets concurrently: one STUN
+        # round trip instead of two
+        sockets = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(2)]
         
         try:
-            addr2 = self.stun_client.get_public_address(sock)
+            addr1, addr2 = self.stun_client.get_public_addresses(sockets)
+            if not addr1:
+                return "blocked"
             if not addr2:
                 return "unstable"
             
@@ -125,9 +217,10 @@ class NATDetector:
                 return "symmetric"
                 
         finally:
-            sock.close()
+            for sock in sockets:
+                sock.close()
     
-    def get_hole_punch_strategy(self, nat_type: NATType) -> dict:
+    def get_hole_punch_strategy(self, nat_type: NATType) -> Strategy:
         """
         Get recommended hole punching strategy for NAT type.
         
@@ -135,62 +228,9 @@ class NATDetector:
             nat_type: Detected NAT type
             
         Returns:
-            Strategy dictionary with recommendations
+            Strategy record with recommendations
         """
-        strategies = {
-            NATType.UNKNOWN: {
-                "description": "Unknown NAT type",
-                "simultaneous": True,
-                "timeout": 60,
-                "retries": 15,
-                "success_rate": 0.70
-            },
-            NATType.OPEN: {
-                "description": "Direct connection possible",
-                "simultaneous": False,
-                "timeout": 10,
-                "retries": 3,
-                "success_rate": 1.0
-            },
-            NATType.FULL_CONE: {
-                "description": "Easy hole punching",
-                "simultaneous": True,
-                "timeout": 15,
-                "retries": 5,
-                "success_rate": 0.95
-            },
-            NATType.RESTRICTED_CONE: {
-                "description": "Standard hole punching",
-                "simultaneous": True,
-                "timeout": 30,
-                "retries": 10,
-                "success_rate": 0.90
-            },
-            NATType.PORT_RESTRICTED: {
-                "description": "Requires precise timing",
-                "simultaneous": True,
-                "timeout": 45,
-                "retries": 15,
-                "success_rate": 0.85
-            },
-            NATType.SYMMETRIC: {
-                "description": "Difficult, may need TURN",
-                "simultaneous": True,
-                "timeout": 60,
-                "retries": 20,
-                "success_rate": 0.40,
-                "turn_fallback": True
-            },
-            NATType.BLOCKED: {
-                "description": "Connection blocked",
-                "simultaneous": False,
-                "timeout": 0,
-                "retries": 0,
-                "success_rate": 0.0
-            }
-        }
-        
-        return strategies.get(nat_type, strategies[NATType.UNKNOWN])
+        return _STRATEGY_TABLE.get(nat_type, _STRATEGY_TABLE[NATType.UNKNOWN])
 
 
 # Example usage
@@ -203,8 +243,8 @@ if __name__ == "__main__":
     print(f"Detected NAT type: {nat_type.value}")
     
     strategy = detector.get_hole_punch_strategy(nat_type)
-    print(f"Strategy: {strategy['description']}")
-    print(f"Simultaneous send: {strategy['simultaneous']}")
-    print(f"Timeout: {strategy['timeout']}s")
-    print(f"Retries: {strategy['retries']}")
-    print(f"Expected success rate: {strategy['success_rate']*100:.0f}%")
+    print(f"Strategy: {strategy.description}")
+    print(f"Simultaneous send: {strategy.simultaneous}")
+    print(f"Timeout: {strategy.timeout}s")
+    print(f"Retries: {strategy.retries}")
+    print(f"Expected success rate: {strategy.success_rate*100:.0f}%")
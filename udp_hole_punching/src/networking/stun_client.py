@@ -6,8 +6,21 @@ Helps discover public IP and port behind NAT.
 
 import socket
 import struct
-import random
-from typing import Optional, Tuple
+import secrets
+import selectors
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+# Binding Request header up to the transaction ID: type, message length
+# (no attributes), magic cookie
+_BINDING_REQUEST_PREFIX = struct.pack('>HHI', 0x0001, 0, 0x2112A442)
+
+# Precompiled layouts for response parsing
+_MSG_TYPE = struct.Struct('>H')
+_ATTR_HEADER = struct.Struct('>HH')     # attribute type, value length
+_PORT = struct.Struct('>H')            # address attribute port
 
 
 class STUNError(Exception):
@@ -39,6 +52,16 @@ class STUNClient:
     MAPPED_ADDRESS = 0x0001
     XOR_MAPPED_ADDRESS = 0x0020
     
+    # First retransmit timeout (s), doubled per retransmit
+    INITIAL_RTO = 0.5
+    
+    # Seconds a resolved server address is reused
+    RESOLVE_TTL = 3600.0
+    
+    # (host, port) -> ((ip, port), expiry), shared by all clients
+    _addr_cache: Dict[Tuple[str, int], Tuple[Tuple[str, int], float]] = {}
+    _addr_lock = threading.Lock()
+    
     def __init__(self, servers: list = None, timeout: float = 5.0):
         """
         Initialize STUN client.
@@ -50,62 +73,78 @@ class STUNClient:
         self.servers = servers or self.DEFAULT_SERVERS
         self.timeout = timeout
     
-    def _create_binding_request(self) -> bytes:
-        """Create a STUN binding request."""
-        # Message type: Binding Request
-        msg_type = struct.pack('>H', self.BINDING_REQUEST)
+    def _resolve(self, host: str, port: int) -> Optional[Tuple[str, int]]:
+        """
+        Resolve a STUN server to an IPv4 (ip, port), cached for RESOLVE_TTL.
         
-        # Message length (no attributes)
-        msg_len = struct.pack('>H', 0)
+        sendto() with a hostname does a DNS lookup on every call; probing
+        with the cached address skips that.
         
-        # Magic cookie
-        magic_cookie = struct.pack('>I', 0x2112A442)
+        Returns:
+            (ip, port) or None if the name does not resolve
+        """
+        key = (host, port)
+        now = time.monotonic()
+        with self._addr_lock:
+            cached = self._addr_cache.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
         
-        # Transaction ID (12 bytes)
-        transaction_id = bytes([random.randint(0, 255) for _ in range(12)])
+        try:
+            infos = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_DGRAM)
+        except socket.gaierror as e:
+            print(f"STUN server {host} failed: {e}")
+            return None
         
-        return msg_type + msg_len + magic_cookie + transaction_id
+        addr = (infos[0][4][0], port)
+        with self._addr_lock:
+            self._addr_cache[key] = (addr, now + self.RESOLVE_TTL)
+        return addr
+    
+    def prewarm(self):
+        """Resolve every configured server now, so the first probe skips DNS."""
+        for server_host, server_port in self.servers:
+            self._resolve(server_host, server_port)
+    
+    def _create_binding_request(self) -> bytes:
+        """Create a STUN binding request."""
+        # Fixed header (type, zero length, magic cookie) + random
+        # transaction ID from the OS CSPRNG, as RFC 8489 requires
+        return _BINDING_REQUEST_PREFIX + secrets.token_bytes(12)
     
     def _parse_address(self, data: bytes, offset: int) -> Tuple[str, int]:
         """Parse address from STUN attribute."""
         # Skip first byte (unused)
         family = data[offset + 1]
-        port = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        port, = _PORT.unpack_from(data, offset + 2)
         
         if family == 0x01:  # IPv4
-            ip = '.'.join(str(b) for b in data[offset + 4:offset + 8])
+            ip = socket.inet_ntop(socket.AF_INET, data[offset + 4:offset + 8])
         else:  # IPv6
-            ip = ':'.join(
-                format(struct.unpack('>H', data[i:i+2])[0], '04x')
-                for i in range(offset + 4, offset + 20, 2)
-            )
+            ip = socket.inet_ntop(socket.AF_INET6, data[offset + 4:offset + 20])
         
         return ip, port
     
-    def _parse_xor_address(self, data: bytes, offset: int, magic_cookie: bytes) -> Tuple[str, int]:
-        """Parse XOR-mapped address."""
+    def _parse_xor_address(self, data: bytes, offset: int, xor_key: bytes) -> Tuple[str, int]:
+        """
+        Parse XOR-mapped address.
+        
+        xor_key is the magic cookie followed by the transaction ID (header
+        bytes 4-20): IPv4 addresses are XORed with the cookie, IPv6 with
+        all 16 bytes. Each address is unmasked with one int XOR.
+        """
         # Port is XORed with first 2 bytes of magic cookie
-        xport = struct.unpack('>H', data[offset + 2:offset + 4])[0]
-        port = xport ^ struct.unpack('>H', magic_cookie[:2])[0]
+        port = _PORT.unpack_from(data, offset + 2)[0] ^ 0x2112
         
-        # IP is XORed with magic cookie
         family = data[offset + 1]
         
         if family == 0x01:  # IPv4
-            ip_bytes = bytearray(4)
-            for i in range(4):
-                ip_bytes[i] = data[offset + 4 + i] ^ magic_cookie[i]
-            ip = '.'.join(str(b) for b in ip_bytes)
+            ip_int = int.from_bytes(data[offset + 4:offset + 8], 'big') ^ 0x2112A442
+            ip = socket.inet_ntop(socket.AF_INET, ip_int.to_bytes(4, 'big'))
         else:  # IPv6
-            ip_parts = []
-            for i in range(8):
-                xpart = struct.unpack('>H', data[offset + 4 + i*2:offset + 6 + i*2])[0]
-                if i < 2:
-                    part = xpart ^ struct.unpack('>H', magic_cookie[i*2:i*2+2])[0]
-                else:
-                    part = xpart  # Remaining bytes are XORed with transaction ID
-                ip_parts.append(format(part, '04x'))
-            ip = ':'.join(ip_parts)
+            ip_int = (int.from_bytes(data[offset + 4:offset + 20], 'big')
+                      ^ int.from_bytes(xor_key, 'big'))
+            ip = socket.inet_ntop(socket.AF_INET6, ip_int.to_bytes(16, 'big'))
         
         return ip, port
     
@@ -114,30 +153,26 @@ class STUNClient:
         if len(data) < 20:
             return None
         
-        msg_type = struct.unpack('>H', data[0:2])[0]
+        msg_type, = _MSG_TYPE.unpack_from(data, 0)
         if msg_type != self.BINDING_RESPONSE:
             return None
         
-        magic_cookie = data[4:8]
+        # Magic cookie + transaction ID: the XOR-MAPPED-ADDRESS mask
+        xor_key = data[4:20]
         
-        # Parse attributes
+        # Parse attributes: headers are unpacked in place, no slicing
         offset = 20
-        while offset < len(data):
-            if offset + 4 > len(data):
-                break
-            
-            attr_type = struct.unpack('>H', data[offset:offset + 2])[0]
-            attr_len = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        end = len(data)
+        while offset + 4 <= end:
+            attr_type, attr_len = _ATTR_HEADER.unpack_from(data, offset)
             
             if attr_type == self.MAPPED_ADDRESS:
                 return self._parse_address(data, offset + 4)
             elif attr_type == self.XOR_MAPPED_ADDRESS:
-                return self._parse_xor_address(data, offset + 4, magic_cookie)
+                return self._parse_xor_address(data, offset + 4, xor_key)
             
-            # Move to next attribute (with padding)
-            offset += 4 + attr_len
-            if attr_len % 4 != 0:
-                offset += 4 - (attr_len % 4)
+            # Move to next attribute (value padded to a multiple of 4)
+            offset += 4 + ((attr_len + 3) & ~3)
         
         return None
     
@@ -148,6 +183,12 @@ class STUNClient:
         """
         Discover public IP and port using STUN.
         
+        The binding request goes to every server at once and the first
+        valid answer wins, so an unreachable server costs nothing while
+        another one answers. Unanswered requests are retransmitted with
+        the same transaction ID after 0.5 s, 1 s, 2 s... (RFC 5389 7.2.1)
+        until timeout.
+        
         Args:
             local_socket: Optional socket to use (creates new if None)
             
@@ -159,32 +200,125 @@ class STUNClient:
         
         try:
             request = self._create_binding_request()
+            transaction_id = request[8:20]
             
+            server_addrs = []
             for server_host, server_port in self.servers:
-                try:
-                    # Send request
-                    sock.sendto(request, (server_host, server_port))
+                server_addr = self._resolve(server_host, server_port)
+                if server_addr is not None:
+                    server_addrs.append(server_addr)
+            if not server_addrs:
+                return None
+            
+            deadline = time.monotonic() + self.timeout
+            next_send = 0.0
+            rto = self.INITIAL_RTO
+            
+            with selectors.DefaultSelector() as sel:
+                sel.register(sock, selectors.EVENT_READ)
+                
+                while True:
+                    now = time.monotonic()
+                    if now >= next_send:
+                        for server_addr in server_addrs:
+                            try:
+                                sock.sendto(request, server_addr)
+                            except OSError as e:
+                                print(f"STUN server {server_addr[0]} failed: {e}")
+                        next_send = now + rto
+                        rto *= 2
                     
-                    # Receive response
-                    data, addr = sock.recvfrom(1024)
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return None
                     
-                    # Parse response
+                    if not sel.select(min(remaining, next_send - now)):
+                        continue
+                    try:
+                        data, addr = sock.recvfrom(1024)
+                    except OSError:
+                        continue
+                    
+                    # Ignore anything but an answer to this request
+                    if data[8:20] != transaction_id:
+                        continue
                     result = self._parse_response(data)
                     if result:
                         return result
-                        
-                except socket.timeout:
-                    continue
-                except Exception as e:
-                    print(f"STUN server {server_host} failed: {e}")
-                    continue
-            
-            return None
             
         finally:
             if not local_socket:
                 sock.close()
     
+    def get_public_addresses(
+        self,
+        sockets: List[socket.socket]
+    ) -> List[Optional[Tuple[str, int]]]:
+        """
+        Discover the public mapping of several sockets at once.
+        
+        Binding requests go out from every socket back to back and the
+        replies are collected in one select loop, so probing N sockets
+        costs about one STUN round trip rather than N.
+        
+        Args:
+            sockets: UDP sockets to probe (left open)
+            
+        Returns:
+            (public_ip, public_port) or None for each socket, in order
+        """
+        results: List[Optional[Tuple[str, int]]] = [None] * len(sockets)
+        pending = set(range(len(sockets)))
+        
+        with selectors.DefaultSelector() as sel:
+            for server_host, server_port in self.servers:
+                if not pending:
+                    break
+                server_addr = self._resolve(server_host, server_port)
+                if server_addr is None:
+                    continue
+                
+                # Send a fresh request from every socket still unanswered
+                transactions = {}
+                for i in list(pending):
+                    request = self._create_binding_request()
+                    try:
+                        sockets[i].sendto(request, server_addr)
+                    except OSError as e:
+                        print(f"STUN server {server_host} failed: {e}")
+                        continue
+                    transactions[i] = request[8:20]
+                    sel.register(sockets[i], selectors.EVENT_READ, i)
+                
+                deadline = time.monotonic() + self.timeout
+                while transactions:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    for key, _ in sel.select(remaining):
+                        i = key.data
+                        try:
+                            data, _ = key.fileobj.recvfrom(1024)
+                        except OSError as e:
+                            # e.g. ICMP port unreachable: give up on this server
+                            print(f"STUN server {server_host} failed: {e}")
+                            data = None
+                        else:
+                            # Ignore stray replies to an earlier transaction
+                            if data[8:20] != transactions[i]:
+                                continue
+                        result = data and self._parse_response(data)
+                        if result:
+                            results[i] = result
+                            pending.discard(i)
+                        del transactions[i]
+                        sel.unregister(key.fileobj)
+                
+                for i in transactions:
+                    sel.unregister(sockets[i])
+        
+        return results
+    
     def test_nat_type(self) -> str:
         """
         Basic NAT type detection.
@@ -5,17 +5,29 @@ Establishes direct P2P connections through NAT using UDP hole punching.
 """
 
 import socket
+import logging
+import selectors
 import time
-import struct
 import secrets
 from dataclasses import dataclass
-from typing import Optional, Callable, Tuple
+from typing import Iterable, List, Optional, Callable, Sequence, Tuple
 from enum import Enum
 
 try:
-    from ..security.encryption import CryptoManager
+    from ..security.encryption import CryptoManager, PACKET_OVERHEAD
 except ImportError:
-    from security.encryption import CryptoManager
+    from security.encryption import CryptoManager, PACKET_OVERHEAD
+
+try:
+    from .batch_recv import RecvBatch
+except ImportError:
+    from networking.batch_recv import RecvBatch
+
+
+logger = logging.getLogger(__name__)
+
+# Windows sockets have no sendmsg
+_HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')
 
 
 class HolePunchState(Enum):
@@ -51,12 +63,27 @@ class UDPHolePuncher:
     PKT_KEEPALIVE = 0x03
     PKT_DATA = 0x04
     
+    # Clear-text type byte of each packet type (authenticated as AAD), built once
+    _TYPE_BYTES = {t: bytes((t,)) for t in (PKT_PUNCH, PKT_PUNCH_ACK, PKT_KEEPALIVE, PKT_DATA)}
+    
+    # Every punch packet has the same length: type + random + empty AEAD packet
+    _PACKET_LEN = 1 + 16 + PACKET_OVERHEAD
+    
+    # Default retransmit schedule: a quick burst below retry_interval, then
+    # doubling from retry_interval up to RETRY_MAX (RFC 5389 7.2.1 style)
+    RETRY_BURST = (0.02, 0.02, 0.05, 0.1, 0.25)
+    RETRY_MAX = 4.0
+    
+    # Datagrams drained per recvmmsg call while punching or listening
+    RECV_BATCH = 32
+    
     def __init__(
         self,
         crypto_manager: CryptoManager,
         timeout: float = 60.0,
         retry_interval: float = 0.5,
-        on_state_change: Optional[Callable] = None
+        on_state_change: Optional[Callable] = None,
+        retry_schedule: Optional[Sequence[float]] = None
     ):
         """
         Initialize hole puncher.
@@ -64,17 +91,41 @@ class UDPHolePuncher:
         Args:
             crypto_manager: For encrypting/decrypting packets
             timeout: Total timeout for hole punching
-            retry_interval: Interval between punch attempts
+            retry_interval: First backed-off interval between punch attempts
+                (must be positive)
             on_state_change: Callback for state changes
+            retry_schedule: Seconds between successive punches (the last
+                entry repeats); defaults to a burst, then doubling from
+                retry_interval
         """
+        if retry_interval <= 0:
+            raise ValueError("retry_interval must be positive")
+        if retry_schedule is not None and not retry_schedule:
+            raise ValueError("retry_schedule must not be empty")
+        
         self.crypto = crypto_manager
+        # Bound once: every punch packet goes through one of these
+        self._encrypt_parts = crypto_manager.encrypt_packet_parts
+        self._decrypt = crypto_manager.decrypt_packet
         self.timeout = timeout
         self.retry_interval = retry_interval
         self.on_state_change = on_state_change
         
+        if retry_schedule is None:
+            retry_schedule = [t for t in self.RETRY_BURST if t < retry_interval]
+            interval = retry_interval
+            while interval < self.RETRY_MAX:
+                retry_schedule.append(interval)
+                interval *= 2
+            retry_schedule.append(max(self.RETRY_MAX, retry_interval))
+        self.retry_schedule = tuple(retry_schedule)
+        
         self.state = HolePunchState.IDLE
         self.socket: Optional[socket.socket] = None
         self.local_port: Optional[int] = None
+        
+        # Punch packets are tiny; 2048 bytes per slot as with recvfrom(2048)
+        self._rx_batch = RecvBatch(self.RECV_BATCH, 2048, addresses=True)
     
     def _set_state(self, new_state: HolePunchState):
         """Update state and notify."""
@@ -82,7 +133,7 @@ class UDPHolePuncher:
         self.state = new_state
         if self.on_state_change:
             self.on_state_change(old_state, new_state)
-        print(f"[HolePunch] State: {old_state.value} -> {new_state.value}")
+        logger.info("[HolePunch] State: %s -> %s", old_state.value, new_state.value)
     
     def _create_socket(self, preferred_port: Optional[int] = None) -> socket.socket:
         """Create and configure UDP socket."""
@@ -101,40 +152,58 @@ class UDPHolePuncher:
         self.local_port = sock.getsockname()[1]
         return sock
     
+    def _punch_packet_parts(self, packet_type: int) -> Tuple[bytes, bytes, bytes, bytes]:
+        """Encrypted punch packet as (type, random prefix, magic + nonce, tag)."""
+        # Format: [packet_type:1][random:16][encrypted packet (empty plaintext,
+        # packet_type as associated data)]
+        type_byte = self._TYPE_BYTES[packet_type]
+        header, ciphertext = self._encrypt_parts(b'', type_byte)
+        return type_byte, secrets.token_bytes(16), header, ciphertext
+    
     def _create_punch_packet(self, packet_type: int) -> bytes:
         """Create encrypted punch packet."""
-        # Format: [packet_type:1][nonce:16][encrypted_data]
-        nonce = secrets.token_bytes(16)
-        data = struct.pack('B', packet_type)
+        return b''.join(self._punch_packet_parts(packet_type))
+    
+    def _send_punch(self, packet_type: int, *addrs: Tuple[str, int]):
+        """
+        Send one punch packet to each address.
         
-        encrypted = self.crypto.encrypt_packet(data)
-        return nonce + encrypted
+        The packet is encrypted once and the same parts go to every
+        address; sendmsg gathers them without joining them.
+        """
+        parts = self._punch_packet_parts(packet_type)
+        if _HAS_SENDMSG:
+            for addr in addrs:
+                self.socket.sendmsg(parts, (), 0, addr)
+        else:
+            packet = b''.join(parts)
+            for addr in addrs:
+                self.socket.sendto(packet, addr)
     
     def _parse_packet(self, data: bytes) -> Optional[int]:
-        """Parse and decrypt incoming packet."""
+        """Parse and authenticate incoming packet."""
+        # Wrong length or unknown type: reject without touching AES-GCM
+        if len(data) != self._PACKET_LEN:
+            return None
+        
+        type_byte = self._TYPE_BYTES.get(data[0])
+        if type_byte is None:
+            return None
+        
         try:
-            if len(data) < 17:  # nonce + at least 1 byte
-                return None
-            
-            nonce = data[:16]
-            encrypted = data[16:]
-            
-            # Decrypt
-            plaintext = self.crypto.decrypt_packet(encrypted)
-            
-            if len(plaintext) < 1:
-                return None
-            
-            return struct.unpack('B', plaintext[:1])[0]
-            
+            # Authenticates the clear-text type byte via the AAD
+            self._decrypt(data[17:], type_byte)
         except Exception:
             return None
+        
+        return data[0]
     
     def punch(
         self,
         target_ip: str,
         target_port: int,
-        local_port: Optional[int] = None
+        local_port: Optional[int] = None,
+        candidates: Sequence[Tuple[str, int]] = ()
     ) -> HolePunchResult:
         """
         Attempt to punch a hole through NAT to target.
@@ -143,84 +212,16 @@ class UDPHolePuncher:
             target_ip: Target public IP
             target_port: Target UDP port
             local_port: Optional preferred local port
+            candidates: Further (ip, port) addresses of the same peer (e.g.
+                its LAN address) punched alongside the target; the first
+                to answer wins
             
         Returns:
-            HolePunchResult with socket if successful
+            HolePunchResult with socket if successful; the socket is
+            non-blocking (recvfrom raises BlockingIOError when idle)
         """
-        self._set_state(HolePunchState.PREPARING)
-        
-        # Create socket
-        self.socket = self._create_socket(local_port)
-        target_addr = (target_ip, target_port)
-        
-        self._set_state(HolePunchState.PUNCHING)
-        
-        start_time = time.time()
-        attempts = 0
-        last_send_time = 0
-        
-        while time.time() - start_time < self.timeout:
-            attempts += 1
-            now = time.time()
-            elapsed = now - start_time
-            
-            # Send punch packet
-            if now - last_send_time >= self.retry_interval:
-                try:
-                    packet = self._create_punch_packet(self.PKT_PUNCH)
-                    self.socket.sendto(packet, target_addr)
-                    last_send_time = now
-                    print(f"[HolePunch] Punch attempt {attempts} to {target_ip}:{target_port}")
-                except Exception as e:
-                    print(f"[HolePunch] Send error: {e}")
-            
-            # Try to receive
-            try:
-                data, addr = self.socket.recvfrom(2048)
-                packet_type = self._parse_packet(data)
-                
-                if packet_type == self.PKT_PUNCH_ACK:
-                    latency = (time.time() - start_time) * 1000
-                    self._set_state(HolePunchState.CONNECTED)
-                    print(f"[HolePunch] Success! Connected to {addr}")
-                    print(f"[HolePunch] Latency: {latency:.1f}ms")
-                    
-                    return HolePunchResult(
-                        success=True,
-                        socket=self.socket,
-                        peer_address=addr,
-                        latency_ms=latency,
-                        attempts=attempts
-                    )
-                    
-                elif packet_type == self.PKT_PUNCH:
-                    # Received punch from peer, send ACK
-                    ack_packet = self._create_punch_packet(self.PKT_PUNCH_ACK)
-                    self.socket.sendto(ack_packet, addr)
-                    print(f"[HolePunch] Received punch from {addr}, sending ACK")
-                    
-            except BlockingIOError:
-                # No data available
-                pass
-            except Exception as e:
-                print(f"[HolePunch] Receive error: {e}")
-            
-            # Small delay to prevent busy-waiting
-            time.sleep(0.01)
-        
-        # Timeout
-        self._set_state(HolePunchState.FAILED)
-        self.socket.close()
-        self.socket = None
-        
-        return HolePunchResult(
-            success=False,
-            socket=None,
-            peer_address=None,
-            latency_ms=0,
-            attempts=attempts,
-            error_message="Timeout"
-        )
+        session = _PunchSession(self, target_ip, target_port, local_port, candidates)
+        return _run_punches([session])[0]
     
     def listen_for_punch(
         self,
@@ -237,55 +238,74 @@ class UDPHolePuncher:
             timeout: Listen timeout
             
         Returns:
-            HolePunchResult with socket if successful
+            HolePunchResult with socket if successful; the socket is
+            non-blocking (recvfrom raises BlockingIOError when idle)
         """
         self._set_state(HolePunchState.PREPARING)
         
+        # Non-blocking socket; the selector waits exactly until the deadline
         self.socket = self._create_socket(local_port)
-        self.socket.settimeout(1.0)  # 1 second timeout for recv
         
         self._set_state(HolePunchState.PUNCHING)
         
-        start_time = time.time()
+        start_ns = time.monotonic_ns()
+        deadline_ns = start_ns + int(timeout * 1e9)
         attempts = 0
         
-        while time.time() - start_time < timeout:
-            attempts += 1
-            
-            try:
-                data, addr = self.socket.recvfrom(2048)
-                
-                # Check if from expected IP
-                if expected_ip and addr[0] != expected_ip:
-                    print(f"[HolePunch] Ignoring packet from unexpected source: {addr}")
+        sel = selectors.DefaultSelector()
+        sel.register(self.socket, selectors.EVENT_READ)
+        # Loop-invariant lookups hoisted into locals
+        select = sel.select
+        recvfrom = self._rx_batch.recvfrom
+        parse = self._parse_packet
+        sock = self.socket
+        
+        try:
+            while True:
+                remaining_ns = deadline_ns - time.monotonic_ns()
+                if remaining_ns <= 0:
+                    break
+                if not select(remaining_ns / 1e9):
                     continue
                 
-                packet_type = self._parse_packet(data)
+                # Drain everything that arrived, a batch per syscall
+                try:
+                    datagrams = recvfrom(sock)
+                except Exception as e:
+                    logger.warning("[HolePunch] Listen error: %s", e)
+                    continue
                 
-                if packet_type == self.PKT_PUNCH:
-                    # Send ACK
-                    ack_packet = self._create_punch_packet(self.PKT_PUNCH_ACK)
-                    self.socket.sendto(ack_packet, addr)
-                    
-                    latency = (time.time() - start_time) * 1000
-                    self._set_state(HolePunchState.CONNECTED)
-                    print(f"[HolePunch] Received punch from {addr}, connection established")
+                for data, addr in datagrams:
+                    attempts += 1
                     
-                    # Set back to non-blocking for normal operation
-                    self.socket.setblocking(False)
+                    # Check if from expected IP
+                    if expected_ip and addr[0] != expected_ip:
+                        logger.debug("[HolePunch] Ignoring packet from unexpected source: %s", addr)
+                        continue
                     
-                    return HolePunchResult(
-                        success=True,
-                        socket=self.socket,
-                        peer_address=addr,
-                        latency_ms=latency,
-                        attempts=attempts
-                    )
+                    packet_type = parse(data)
                     
-            except socket.timeout:
-                continue
-            except Exception as e:
-                print(f"[HolePunch] Listen error: {e}")
+                    if packet_type == self.PKT_PUNCH:
+                        # Send ACK
+                        try:
+                            self._send_punch(self.PKT_PUNCH_ACK, addr)
+                        except Exception as e:
+                            logger.warning("[HolePunch] Listen error: %s", e)
+                            continue
+                        
+                        latency = (time.monotonic_ns() - start_ns) / 1e6
+                        self._set_state(HolePunchState.CONNECTED)
+                        logger.info("[HolePunch] Received punch from %s, connection established", addr)
+                        
+                        return HolePunchResult(
+                            success=True,
+                            socket=self.socket,
+                            peer_address=addr,
+                            latency_ms=latency,
+                            attempts=attempts
+                        )
+        finally:
+            sel.close()
         
         # Timeout
         self._set_state(HolePunchState.FAILED)
@@ -309,6 +329,204 @@ class UDPHolePuncher:
         self._set_state(HolePunchState.IDLE)
 
 
+class _PunchSession:
+    """
+    State of one punch() in progress.
+    
+    Holds the retransmit timers and counters; the socket it opens is set
+    on the puncher, as punch() always did. _run_punches drives any number
+    of sessions from one selector, calling on_timer() when wake_ns()
+    passes and on_readable() when the socket has data.
+    """
+    
+    def __init__(
+        self,
+        puncher: UDPHolePuncher,
+        target_ip: str,
+        target_port: int,
+        local_port: Optional[int] = None,
+        candidates: Sequence[Tuple[str, int]] = ()
+    ):
+        self.puncher = puncher
+        self.target_ip = target_ip
+        self.target_port = target_port
+        self.target_addrs = (target_ip, target_port), *candidates
+        
+        puncher._set_state(HolePunchState.PREPARING)
+        
+        # Create socket
+        self.sock = puncher.socket = puncher._create_socket(local_port)
+        
+        puncher._set_state(HolePunchState.PUNCHING)
+        
+        # Monotonic integer clock: immune to wall-clock steps (NTP)
+        self.start_ns = time.monotonic_ns()
+        self.deadline_ns = self.start_ns + int(puncher.timeout * 1e9)
+        self.schedule_ns = [int(t * 1e9) for t in puncher.retry_schedule]
+        self.attempts = 0
+        self.step = 0  # Position in schedule_ns
+        self.next_send_ns = self.start_ns
+        
+        # Loop-invariant lookups bound once
+        self._recvfrom = puncher._rx_batch.recvfrom
+        self._parse = puncher._parse_packet
+    
+    def wake_ns(self) -> int:
+        """When on_timer() next has work: the next punch or the deadline."""
+        return min(self.next_send_ns, self.deadline_ns)
+    
+    def on_timer(self, now_ns: int) -> Optional[HolePunchResult]:
+        """Send a punch if one is due; the failed result once past the deadline."""
+        if now_ns >= self.deadline_ns:
+            return self._timed_out()
+        
+        if now_ns >= self.next_send_ns:
+            self.attempts += 1
+            try:
+                self.puncher._send_punch(UDPHolePuncher.PKT_PUNCH, *self.target_addrs)
+                # Once per retransmit: skip even the call unless debugging
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("[HolePunch] Punch attempt %d to %s:%d",
+                                 self.attempts, self.target_ip, self.target_port)
+            except Exception as e:
+                logger.warning("[HolePunch] Send error: %s", e)
+            self.next_send_ns = now_ns + self.schedule_ns[self.step]
+            self.step = min(self.step + 1, len(self.schedule_ns) - 1)
+        return None
+    
+    def on_readable(self) -> Optional[HolePunchResult]:
+        """Drain the socket; the success result on a PUNCH_ACK."""
+        puncher = self.puncher
+        
+        # Drain everything that arrived, a batch per syscall
+        try:
+            datagrams = self._recvfrom(self.sock)
+        except Exception as e:
+            logger.warning("[HolePunch] Receive error: %s", e)
+            return None
+        
+        for data, addr in datagrams:
+            packet_type = self._parse(data)
+            
+            if packet_type == UDPHolePuncher.PKT_PUNCH_ACK:
+                latency = (time.monotonic_ns() - self.start_ns) / 1e6
+                puncher._set_state(HolePunchState.CONNECTED)
+                logger.info("[HolePunch] Success! Connected to %s", addr)
+                logger.info("[HolePunch] Latency: %.1fms", latency)
+                
+                return HolePunchResult(
+                    success=True,
+                    socket=self.sock,
+                    peer_address=addr,
+                    latency_ms=latency,
+                    attempts=self.attempts
+                )
+                
+            elif packet_type == UDPHolePuncher.PKT_PUNCH:
+                # Received punch from peer, send ACK
+                try:
+                    puncher._send_punch(UDPHolePuncher.PKT_PUNCH_ACK, addr)
+                except Exception as e:
+                    logger.warning("[HolePunch] Send error: %s", e)
+                    continue
+                logger.debug("[HolePunch] Received punch from %s, sending ACK", addr)
+                
+                # Peer is live: restart the schedule at its quick end
+                self.step = 0
+                self.next_send_ns = min(self.next_send_ns, time.monotonic_ns() + self.schedule_ns[0])
+        return None
+    
+    def _timed_out(self) -> HolePunchResult:
+        """Give up: close the socket and report the timeout."""
+        self.puncher._set_state(HolePunchState.FAILED)
+        self.sock.close()
+        self.puncher.socket = None
+        
+        return HolePunchResult(
+            success=False,
+            socket=None,
+            peer_address=None,
+            latency_ms=0,
+            attempts=self.attempts,
+            error_message="Timeout"
+        )
+
+
+def _abort_sessions(sessions: Iterable[_PunchSession]):
+    """Close the sockets of unfinished sessions and mark their punchers failed."""
+    for session in sessions:
+        session.sock.close()
+        session.puncher.socket = None
+        session.puncher._set_state(HolePunchState.FAILED)
+
+
+def _run_punches(sessions: Sequence[_PunchSession]) -> List[HolePunchResult]:
+    """Drive sessions to completion from one selector; results in order."""
+    results: List[Optional[HolePunchResult]] = [None] * len(sessions)
+    pending = {}
+    
+    sel = selectors.DefaultSelector()
+    try:
+        for index, session in enumerate(sessions):
+            sel.register(session.sock, selectors.EVENT_READ, index)
+            pending[index] = session
+        
+        while pending:
+            now_ns = time.monotonic_ns()
+            for index, session in list(pending.items()):
+                if session.wake_ns() <= now_ns:
+                    # Unregister first: a timed-out session closes its socket
+                    if session.deadline_ns <= now_ns:
+                        sel.unregister(session.sock)
+                        del pending[index]
+                    results[index] = session.on_timer(now_ns)
+            if not pending:
+                break
+            
+            # Sleep until a packet arrives or the earliest timer is due
+            wake_ns = min(session.wake_ns() for session in pending.values())
+            for key, _ in sel.select(max(wake_ns - now_ns, 0) / 1e9):
+                index = key.data
+                result = pending[index].on_readable()
+                if result is not None:
+                    sel.unregister(key.fileobj)
+                    del pending[index]
+                    results[index] = result
+    except BaseException:
+        # Sessions left unfinished would otherwise leak their sockets
+        _abort_sessions(pending.values())
+        raise
+    finally:
+        sel.close()
+    
+    return results
+
+
+def punch_concurrently(
+    jobs: Sequence[Tuple[UDPHolePuncher, str, int]]
+) -> List[HolePunchResult]:
+    """
+    Punch several peers at once from the calling thread.
+    
+    Each job is (puncher, target_ip, target_port): one UDPHolePuncher per
+    peer, as each peer has its own session keys. All punches share one
+    selector, so hundreds of them need no extra threads; each behaves as
+    puncher.punch(target_ip, target_port) would.
+    
+    Returns:
+        One HolePunchResult per job, in job order
+    """
+    sessions = []
+    try:
+        for puncher, ip, port in jobs:
+            sessions.append(_PunchSession(puncher, ip, port))
+    except BaseException:
+        # Each session has bound a socket; don't leak the ones already built
+        _abort_sessions(sessions)
+        raise
+    return _run_punches(sessions)
+
+
 # Example usage
 if __name__ == "__main__":
     import secrets
@@ -10,20 +10,34 @@ Emergency key rotation protocol that:
 
 import json
 import time
+import logging
+import hmac
 import hashlib
 import secrets
-from enum import Enum, auto
-from typing import Optional, Callable
+from enum import IntFlag
+from typing import Optional, Callable, Tuple
 from dataclasses import dataclass
 
 
-class CompromisedState(Enum):
-    """State of compromised protocol."""
-    NORMAL = auto()
-    SIGNAL_SENT = auto()
-    SIGNAL_RECEIVED = auto()
-    KEYS_DESTROYED = auto()
-    WAITING_FOR_NEW_KEYS = auto()
+logger = logging.getLogger(__name__)
+
+
+class CompromisedState(IntFlag):
+    """State of compromised protocol (one bit per state)."""
+    NORMAL = 0
+    SIGNAL_SENT = 1
+    SIGNAL_RECEIVED = 2
+    KEYS_DESTROYED = 4
+    WAITING_FOR_NEW_KEYS = 8
+
+
+# Every state except NORMAL; is_compromised() is a single AND against it
+_COMPROMISED_MASK = (
+    CompromisedState.SIGNAL_SENT
+    | CompromisedState.SIGNAL_RECEIVED
+    | CompromisedState.KEYS_DESTROYED
+    | CompromisedState.WAITING_FOR_NEW_KEYS
+)
 
 
 @dataclass
@@ -77,17 +91,65 @@ class CompromisedProtocolHandler:
         
         self.state = CompromisedState.NORMAL
         self.signal_sent_time: Optional[float] = None
+        
+        # Signed data is "<signal>:<connection_id>:<timestamp>"; the
+        # prefixes and the keyed hasher are built once and reused
+        self._signal_prefix = f"{self.SIGNAL_STRING}:{connection_id}:".encode()
+        self._ack_prefix = f"{self.ACK_STRING}:{connection_id}:".encode()
+        self._mac = hashlib.blake2b(key=mac_key, digest_size=32)
+        
+        # Fields every signal/ACK of this connection carries unchanged
+        self._signal_fields = {
+            'type': 'compromised',
+            'version': '2.0',
+            'signal': self.SIGNAL_STRING,
+            'connection_id': connection_id
+        }
+        self._ack_fields = {
+            'type': 'compromised_ack',
+            'version': '2.0',
+            'signal': self.ACK_STRING,
+            'connection_id': connection_id
+        }
+        
+        # What _validate expects of each incoming kind: (type, signal, prefix)
+        self._signal_spec = ('compromised', self.SIGNAL_STRING, self._signal_prefix)
+        self._ack_spec = ('compromised_ack', self.ACK_STRING, self._ack_prefix)
     
-    def _sign_signal(self, signal_data: str) -> str:
-        """Create HMAC signature for signal."""
-        h = hashlib.blake2b(key=self.mac_key, digest_size=32)
-        h.update(signal_data.encode())
-        return h.hexdigest()
+    def _sign_signal(self, signal_data: bytes) -> bytes:
+        """Create HMAC signature for signal (copies the pre-keyed hasher); hex on the wire."""
+        h = self._mac.copy()
+        h.update(signal_data)
+        return h.digest()
     
-    def _verify_signal(self, signal_data: str, signature: str) -> bool:
-        """Verify HMAC signature."""
+    def _verify_signal(self, signal_data: bytes, signature: str) -> bool:
+        """Verify HMAC signature (hex string) against the raw 32-byte digest."""
+        try:
+            provided = bytes.fromhex(signature)
+        except (TypeError, ValueError):
+            return False
         expected = self._sign_signal(signal_data)
-        return secrets.compare_digest(expected, signature)
+        return hmac.compare_digest(expected, provided)
+    
+    def _validate(self, message: dict, spec: tuple) -> Optional[Tuple[int, str, bytes]]:
+        """
+        Check the fixed fields of an incoming signal against spec.
+        
+        Returns:
+            (timestamp, signature, signed data) on success, None on the
+            first mismatching field
+        """
+        msg_type, signal, prefix = spec
+        get = message.get
+        if get('type') != msg_type or get('version') != '2.0' or get('signal') != signal:
+            return None
+        
+        if get('connection_id') != self.connection_id:
+            logger.warning("[Compromised] Connection ID mismatch: %s vs %s", get('connection_id'), self.connection_id)
+            return None
+        
+        timestamp = message['timestamp']
+        return timestamp, message['signature'], prefix + str(timestamp).encode()
     
     def create_compromised_signal(self, reason: str = "user_initiated") -> dict:
         """
@@ -102,15 +164,12 @@ class CompromisedProtocolHandler:
         timestamp = int(time.time())
         
         # Create signal data
-        signal_data = f"{self.SIGNAL_STRING}:{self.connection_id}:{timestamp}"
-        signature = self._sign_signal(signal_data)
+        signal_data = self._signal_prefix + str(timestamp).encode()
+        signature = self._sign_signal(signal_data).hex()
         
         signal = {
-            'type': 'compromised',
-            'version': '2.0',
-            'signal': self.SIGNAL_STRING,
+            **self._signal_fields,
             'timestamp': timestamp,
-            'connection_id': self.connection_id,
             'reason': reason,
             'signature': signature
         }
@@ -132,15 +191,12 @@ class CompromisedProtocolHandler:
         """
         timestamp = int(time.time())
         
-        signal_data = f"{self.ACK_STRING}:{self.connection_id}:{timestamp}"
-        signature = self._sign_signal(signal_data)
+        signal_data = self._ack_prefix + str(timestamp).encode()
+        signature = self._sign_signal(signal_data).hex()
         
         return {
-            'type': 'compromised_ack',
-            'version': '2.0',
-            'signal': self.ACK_STRING,
+            **self._ack_fields,
             'timestamp': timestamp,
-            'connection_id': self.connection_id,
             'action': 'keys_deleted',
             'new_file_ready': new_file_ready,
             'signature': signature
@@ -157,33 +213,23 @@ class CompromisedProtocolHandler:
             True if signal is valid and accepted
         """
         try:
-            # Validate message type
-            if message.get('type') != 'compromised':
-                return False
-            
-            if message.get('version') != '2.0':
-                return False
-            
-            if message.get('signal') != self.SIGNAL_STRING:
-                return False
-            
-            if message.get('connection_id') != self.connection_id:
-                print(f"[Compromised] Connection ID mismatch: {message.get('connection_id')} vs {self.connection_id}")
+            parsed = self._validate(message, self._signal_spec)
+            if parsed is None:
                 return False
+            timestamp, signature, signal_data = parsed
             
             # Verify signature
-            signal_data = f"{self.SIGNAL_STRING}:{self.connection_id}:{message['timestamp']}"
-            if not self._verify_signal(signal_data, message['signature']):
-                print("[Compromised] Signature verification failed")
+            if not self._verify_signal(signal_data, signature):
+                logger.warning("[Compromised] Signature verification failed")
                 return False
             
             # Check timestamp (prevent replay attacks - 5 minute window)
             now = int(time.time())
-            if abs(now - message['timestamp']) > 300:
-                print("[Compromised] Signal timestamp too old")
+            if abs(now - timestamp) > 300:
+                logger.warning("[Compromised] Signal timestamp too old")
                 return False
             
-            print(f"[Compromised] Valid signal received: {message.get('reason')}")
+            logger.warning("[Compromised] Valid signal received: %s", message.get('reason'))
             self.state = CompromisedState.SIGNAL_RECEIVED
             
             # Execute key destruction
@@ -192,7 +238,7 @@ class CompromisedProtocolHandler:
             return True
             
         except Exception as e:
-            print(f"[Compromised] Error handling signal: {e}")
+            logger.error("[Compromised] Error handling signal: %s", e)
             return False
     
     def handle_ack_signal(self, message: dict) -> bool:
@@ -206,24 +252,16 @@ class CompromisedProtocolHandler:
             True if ACK is valid
         """
         try:
-            if message.get('type') != 'compromised_ack':
-                return False
-            
-            if message.get('version') != '2.0':
-                return False
-            
-            if message.get('signal') != self.ACK_STRING:
-                return False
-            
-            if message.get('connection_id') != self.connection_id:
+            parsed = self._validate(message, self._ack_spec)
+            if parsed is None:
                 return False
+            timestamp, signature, signal_data = parsed
             
             # Verify signature
-            signal_data = f"{self.ACK_STRING}:{self.connection_id}:{message['timestamp']}"
-            if not self._verify_signal(signal_data, message['signature']):
+            if not self._verify_signal(signal_data, signature):
                 return False
             
-            print("[Compromised] ACK received from server")
+            logger.warning("[Compromised] ACK received from server")
             
             # Execute key destruction
             self._destroy_keys()
@@ -231,22 +269,23 @@ class CompromisedProtocolHandler:
             return True
             
         except Exception as e:
-            print(f"[Compromised] Error handling ACK: {e}")
+            logger.error("[Compromised] Error handling ACK: %s", e)
             return False
     
     def _destroy_keys(self):
         """Destroy all cryptographic keys."""
-        print("[Compromised] Destroying all keys...")
+        logger.warning("[Compromised] Destroying all keys...")
         
-        # Clear MAC key
+        # Clear MAC key (and the hasher keyed with it)
         self.mac_key = secrets.token_bytes(32)  # Replace with random
+        self._mac = hashlib.blake2b(key=self.mac_key, digest_size=32)
         
         self.state = CompromisedState.KEYS_DESTROYED
         
         if self.on_keys_destroyed:
             self.on_keys_destroyed()
         
-        print("[Compromised] Keys destroyed. Connection terminated.")
+        logger.warning("[Compromised] Keys destroyed. Connection terminated.")
         
         # If server, generate new security file
         if self.is_server:
@@ -256,12 +295,7 @@ class CompromisedProtocolHandler:
     
     def is_compromised(self) -> bool:
         """Check if connection has been compromised."""
-        return self.state in (
-            CompromisedState.SIGNAL_SENT,
-            CompromisedState.SIGNAL_RECEIVED,
-            CompromisedState.KEYS_DESTROYED,
-            CompromisedState.WAITING_FOR_NEW_KEYS
-        )
+        return bool(self.state & _COMPROMISED_MASK)
     
     def get_state(self) -> CompromisedState:
         """Get current state."""
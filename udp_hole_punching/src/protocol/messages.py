@@ -5,12 +5,79 @@ Defines message types and handles message encoding/decoding.
 """
 
 import json
+import secrets
+import functools
 import struct
 import time
+import zlib
 from enum import IntEnum
 from typing import Optional, Dict, Any
 from dataclasses import dataclass, asdict
 
+try:
+    import orjson  # Optional: faster JSON for per-packet payloads
+except ImportError:
+    orjson = None
+
+
+# Precompiled wire header layouts (see Message.to_bytes)
+_HEADER = struct.Struct('!BdB')        # type, timestamp, id_len
+_PAYLOAD_LEN = struct.Struct('!I')
+
+
+def _dumps(obj) -> bytes:
+    """Encode a payload to JSON bytes (orjson when available)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass  # e.g. non-str keys or >64-bit ints; json handles these
+    return json.dumps(obj).encode('utf-8')
+
+
+def _loads(data):
+    """Decode a JSON payload from any bytes-like object (orjson when available)."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            pass  # e.g. NaN/Infinity from a json-encoding peer
+    if isinstance(data, memoryview):
+        data = bytes(data)  # json.loads does not take memoryview
+    return json.loads(data)
+
+
+# Directory listing payloads longer than this are deflated on the wire
+# (see _COMPRESSIBLE); the high bit of the type byte marks a deflated payload
+_COMPRESS_MIN = 512
+_COMPRESS_LEVEL = 1
+_COMPRESSED = 0x80
+# Bound on an inflated payload, so a bad packet cannot balloon in memory
+_INFLATE_MAX = 16 * 1024 * 1024
+
+
+def _pack_payload(msg_type: int, payload_json: bytes) -> tuple:
+    """Return the wire (type byte, payload), deflating a long payload when it pays off."""
+    if len(payload_json) > _COMPRESS_MIN and msg_type in _COMPRESSIBLE:
+        packed = zlib.compress(payload_json, _COMPRESS_LEVEL)
+        if len(packed) < len(payload_json):
+            return msg_type | _COMPRESSED, packed
+    return msg_type, payload_json
+
+
+def _inflate(data) -> bytes:
+    """Inverse of the deflate in _pack_payload, capped at _INFLATE_MAX bytes."""
+    inflater = zlib.decompressobj()
+    payload = inflater.decompress(data, _INFLATE_MAX)
+    if inflater.unconsumed_tail:
+        raise ValueError("Compressed payload too large")
+    return payload
+
+
+# Constant parts of a CHAT payload; suffixes are cached per sender
+_CHAT_TEXT_PREFIX = b'{"text":'
+_chat_suffixes: Dict[str, bytes] = {}
+
 
 class MessageType(IntEnum):
     """Message type enumeration."""
@@ -52,6 +119,14 @@ class MessageType(IntEnum):
     FILE_STAT = 0x56        # Get file info
 
 
+# Types whose payloads may be deflated. Compressing before encryption lets
+# the ciphertext length leak how repetitive the plaintext is (CRIME), so
+# anything mixing private text with text an attacker can steer (chat, LLM
+# output, cron results) stays uncompressed; directory listings are the
+# large payloads worth compressing.
+_COMPRESSIBLE = frozenset({MessageType.FILE_LIST})
+
+
 @dataclass
 class Message:
     """Base message structure."""
@@ -59,50 +134,42 @@ class Message:
     payload: Dict[str, Any]
     timestamp: float = 0
     message_id: str = ""
+    blob: bytes = b""  # Raw binary trailer (file chunks), sent after the payload
     
     def __post_init__(self):
         if self.timestamp == 0:
             self.timestamp = time.time()
         if not self.message_id:
-            import secrets
             self.message_id = secrets.token_hex(8)
     
     def to_bytes(self) -> bytes:
         """Convert to bytes for transmission."""
-        # Format: [type:1][timestamp:8][id_len:1][id][payload_len:4][payload]
-        payload_json = json.dumps(self.payload).encode('utf-8')
+        # Format: [type:1][timestamp:8][id_len:1][id][payload_len:4][payload][blob]
+        wire_type, payload_json = _pack_payload(self.msg_type, _dumps(self.payload))
         msg_id_bytes = self.message_id.encode('utf-8')
         
-        header = struct.pack(
-            '!BdB',
-            self.msg_type,
+        header = _HEADER.pack(
+            wire_type,
             self.timestamp,
             len(msg_id_bytes)
         )
         
-        payload_header = struct.pack('!I', len(payload_json))
+        payload_header = _PAYLOAD_LEN.pack(len(payload_json))
         
-        return header + msg_id_bytes + payload_header + payload_json
+        return header + msg_id_bytes + payload_header + payload_json + self.blob
     
     @classmethod
     def from_bytes(cls, data: bytes) -> 'Message':
         """Parse message from bytes."""
-        # Parse header: [type:1][timestamp:8][id_len:1]
-        msg_type = struct.unpack('!B', data[0:1])[0]
-        timestamp = struct.unpack('!d', data[1:9])[0]
-        id_len = struct.unpack('!B', data[9:10])[0]
-        
-        msg_id = data[10:10+id_len].decode('utf-8')
-        
-        payload_len = struct.unpack('!I', data[10+id_len:14+id_len])[0]
-        payload_json = data[14+id_len:14+id_len+payload_len]
-        payload = json.loads(payload_json.decode('utf-8'))
+        msg_type, timestamp, msg_id, payload_json, blob = parse_header(data)
+        payload = _loads(payload_json)
         
         return cls(
             msg_type=MessageType(msg_type),
             payload=payload,
             timestamp=timestamp,
-            message_id=msg_id
+            message_id=msg_id,
+            blob=blob
         )
     
     def to_json(self) -> str:
@@ -116,6 +183,53 @@ class Message:
         }, indent=2)
 
 
+def parse_header(data) -> tuple:
+    """
+    Parse the fixed message header without building a Message.
+    
+    Accepts any bytes-like object. Fields are unpacked in place with
+    precompiled structs and the id is decoded straight from the buffer.
+    The payload JSON is returned as an undecoded slice (orjson parses
+    UTF-8 bytes directly, so no intermediate str is built); for a
+    memoryview input it is a view, valid only until the buffer is reused.
+    Only the binary trailer (if any) is copied out. A deflated payload
+    is inflated here (returned as bytes) and its flag cleared from msg_type.
+    
+    Returns:
+        (msg_type, timestamp, message_id, payload_json, blob)
+    """
+    # Format: [type:1][timestamp:8][id_len:1][id][payload_len:4][payload][blob]
+    msg_type, timestamp, id_len = _HEADER.unpack_from(data, 0)
+    id_end = _HEADER.size + id_len
+    msg_id = str(data[_HEADER.size:id_end], 'utf-8')
+    
+    payload_len, = _PAYLOAD_LEN.unpack_from(data, id_end)
+    payload_start = id_end + _PAYLOAD_LEN.size
+    payload_end = payload_start + payload_len
+    payload = data[payload_start:payload_end]
+    blob = bytes(data[payload_end:])
+    
+    if msg_type & _COMPRESSED:
+        msg_type &= ~_COMPRESSED
+        payload = _inflate(payload)
+    
+    return msg_type, timestamp, msg_id, payload, blob
+
+
+@functools.lru_cache(maxsize=32)
+def _payload_json_cached(items: tuple) -> bytes:
+    """JSON for an all-str payload given as a tuple of its items (see MessageHandler.encode)."""
+    return _dumps(dict(items))
+
+
+def _frame(msg_type: MessageType, payload_json: bytes, blob=b"") -> bytes:
+    """Wrap pre-serialized payload JSON in a message header (fresh id/timestamp)."""
+    msg_type, payload_json = _pack_payload(msg_type, payload_json)
+    msg_id = secrets.token_hex(8).encode('utf-8')
+    return (_HEADER.pack(msg_type, time.time(), len(msg_id)) + msg_id
+            + _PAYLOAD_LEN.pack(len(payload_json)) + payload_json + blob)
+
+
 class MessageHandler:
     """Handles message encoding/decoding."""
     
@@ -130,6 +244,60 @@ class MessageHandler:
             }
         )
     
+    @staticmethod
+    def encode_chat(text: str, sender: str) -> bytes:
+        """
+        Serialize a chat message straight to wire bytes.
+        
+        Decodes to the same message as create_chat_message(text, sender),
+        but only the text is JSON-encoded per call; the rest of the
+        payload is a cached template and no Message is constructed.
+        """
+        suffix = _chat_suffixes.get(sender)
+        if suffix is None:
+            suffix = b',"sender":' + _dumps(sender) + b'}'
+            _chat_suffixes[sender] = suffix
+        
+        payload = _CHAT_TEXT_PREFIX + _dumps(text) + suffix
+        return _frame(MessageType.CHAT, payload)
+    
+    @staticmethod
+    def encode(msg_type: MessageType, payload: Dict[str, Any]) -> bytes:
+        """
+        Serialize a message straight to wire bytes.
+        
+        Same bytes as Message(msg_type, payload).to_bytes() (fresh id and
+        timestamp), but the payload JSON of small repeated requests - empty
+        CRON_LIST/CRON_RELOAD, re-listing the same directory - comes from
+        a cache. Only all-str payloads are cached: other values can compare
+        equal across types (1 == True == 1.0) and would share a cache entry.
+        """
+        if not payload or all(type(v) is str for v in payload.values()):
+            payload_json = _payload_json_cached(tuple(payload.items()))
+        else:
+            payload_json = _dumps(payload)
+        return _frame(msg_type, payload_json)
+    
+    @staticmethod
+    def int_field_encoder(msg_type: MessageType, payload: Dict[str, Any], key: str):
+        """
+        Build a fast encoder for messages that differ only in one int field.
+        
+        The rest of the payload is serialized once; the returned
+        encode(value, blob=b'') splices the value in and returns wire bytes
+        that decode to Message(msg_type, {**payload, key: value}, blob=blob).
+        Used for file transfer requests, where only the offset changes.
+        """
+        fixed = _dumps(payload)[:-1]  # Drop closing brace
+        if payload:
+            fixed += b','
+        prefix = fixed + _dumps(key) + b':'
+        
+        def encode(value: int, blob=b"") -> bytes:
+            return _frame(msg_type, prefix + str(value).encode('ascii') + b'}', blob)
+        
+        return encode
+    
     @staticmethod
     def create_keepalive() -> Message:
         """Create a keepalive message."""
@@ -10,13 +10,24 @@ import os
 import base64
 import hashlib
 import secrets
-from typing import Union, Tuple
+import itertools
+from typing import List, Union, Tuple
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.backends import default_backend
 
 
+# Prefix on every encrypted UDP packet: lets receivers drop foreign or
+# stale-format datagrams before any AES-GCM work
+PACKET_MAGIC = b'CLW1'
+
+# Bytes encrypt_packet adds to a plaintext: magic + 12-byte nonce + 16-byte tag
+PACKET_OVERHEAD = len(PACKET_MAGIC) + 12 + 16
+
+_NONCE_MASK = (1 << 96) - 1
+
+
 class CryptoError(Exception):
     """Base exception for cryptographic errors."""
     pass
@@ -124,6 +135,9 @@ class CryptoManager:
     
     def __init__(self):
         self._session_keys = None
+        self._packet_aead = None  # AESGCM bound to the session encryption key
+        self._nonce_base = 0
+        self._nonce_ctr = itertools.count()
         self._key_expiry = 0
     
     def encrypt_file(self, plaintext: bytes, password: bytes, 
@@ -201,6 +215,18 @@ class CryptoManager:
     def set_session_keys(self, keys: dict):
         """Set session keys for packet encryption."""
         self._session_keys = keys
+        # Key schedule is computed once per key, not once per packet
+        self._packet_aead = AESGCM(keys['encryption_key']) if keys else None
+        # Packet nonces: one random 96-bit start per key, then a counter.
+        # Both peers share the key, so a random start (not zero) keeps
+        # their ranges apart. Rekey well before 2**48 packets per key.
+        self._nonce_base = int.from_bytes(generate_nonce(12), 'big')
+        self._nonce_ctr = itertools.count()
+    
+    def clear_session_keys(self):
+        """Drop session keys; packet encryption fails until keys are set again."""
+        self._session_keys = None
+        self._packet_aead = None
     
     def encrypt_packet(self, plaintext: bytes, associated_data: bytes = None) -> bytes:
         """
@@ -211,25 +237,60 @@ class CryptoManager:
             associated_data: Additional authenticated data (optional)
             
         Returns:
-            nonce + ciphertext (with embedded auth tag)
+            magic + nonce + ciphertext (with embedded auth tag)
+        """
+        header, ciphertext = self.encrypt_packet_parts(plaintext, associated_data)
+        return header + ciphertext
+    
+    def encrypt_packet_parts(self, plaintext: bytes, associated_data: bytes = None) -> Tuple[bytes, bytes]:
+        """
+        Encrypt a UDP packet without joining header and ciphertext.
+        
+        For scatter-gather sends (socket.sendmsg), which put both buffers
+        in one datagram without an extra copy.
+        
+        Returns:
+            (magic + nonce, ciphertext with embedded auth tag)
         """
         if not self._session_keys:
             raise CryptoError("Session keys not set")
         
-        nonce = generate_nonce(12)
-        key = self._session_keys['encryption_key']
+        # next() on itertools.count is atomic, so concurrent senders never share a nonce
+        nonce = ((self._nonce_base + next(self._nonce_ctr)) & _NONCE_MASK).to_bytes(12, 'big')
+        ciphertext = self._packet_aead.encrypt(nonce, plaintext, associated_data)
         
-        aesgcm = AESGCM(key)
-        ciphertext = aesgcm.encrypt(nonce, plaintext, associated_data)
+        return PACKET_MAGIC + nonce, ciphertext
+    
+    def encrypt_many(self, plaintexts, associated_data: bytes = None) -> List[bytes]:
+        """
+        Encrypt a batch of UDP packets (e.g. one upload window).
+        
+        Same output as calling encrypt_packet on each plaintext, but the
+        cipher, nonce counter and key checks are looked up once per batch
+        rather than once per packet.
+        
+        Returns:
+            List of magic + nonce + ciphertext, in input order
+        """
+        if not self._session_keys:
+            raise CryptoError("Session keys not set")
         
-        return nonce + ciphertext
+        encrypt = self._packet_aead.encrypt
+        base, ctr = self._nonce_base, self._nonce_ctr
+        packets = []
+        for plaintext in plaintexts:
+            nonce = ((base + next(ctr)) & _NONCE_MASK).to_bytes(12, 'big')
+            packets.append(PACKET_MAGIC + nonce + encrypt(nonce, plaintext, associated_data))
+        return packets
     
-    def decrypt_packet(self, ciphertext: bytes, associated_data: bytes = None) -> bytes:
+    def decrypt_packet(self, ciphertext, associated_data: bytes = None) -> bytes:
         """
         Decrypt a UDP packet.
         
         Args:
-            ciphertext: nonce + ciphertext (with embedded auth tag)
+            ciphertext: magic + nonce + ciphertext (with embedded auth tag); any
+                bytes-like object, so a memoryview over a receive buffer
+                can be passed without copying
             associated_data: Additional authenticated data (optional)
             
         Returns:
@@ -238,16 +299,18 @@ class CryptoManager:
         if not self._session_keys:
             raise CryptoError("Session keys not set")
         
-        if len(ciphertext) < 28:  # 12 nonce + 16 min ciphertext
+        if len(ciphertext) < 32:  # 4 magic + 12 nonce + 16 min ciphertext
             raise DecryptionError("Ciphertext too short")
         
-        nonce = ciphertext[:12]
-        encrypted_data = ciphertext[12:]
-        key = self._session_keys['encryption_key']
+        # Cheap reject before paying for AES-GCM authentication
+        if ciphertext[:4] != PACKET_MAGIC:
+            raise DecryptionError("Bad packet magic")
+        
+        nonce = ciphertext[4:16]
+        encrypted_data = ciphertext[16:]
         
         try:
-            aesgcm = AESGCM(key)
-            plaintext = aesgcm.decrypt(nonce, encrypted_data, associated_data)
+            plaintext = self._packet_aead.decrypt(nonce, encrypted_data, associated_data)
             return plaintext
         except Exception as e:
             raise AuthenticationError(f"Decryption failed: {e}")
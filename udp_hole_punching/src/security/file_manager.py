@@ -8,10 +8,12 @@ and loaded via file browser on client.
 
 import os
 import json
+import base64
 import time
 import glob
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
+from functools import cached_property
 from typing import Optional, List, Dict
 from pathlib import Path
 
@@ -39,6 +41,11 @@ class SecurityFile:
     compromised_protocol: Dict
     connection_id: str = ""  # Unique connection identifier
     
+    @cached_property
+    def shared_secret_bytes(self) -> bytes:
+        """Decoded shared secret (decoded once, reused on every connect)."""
+        return base64.b64decode(self.shared_secret)
+    
     def to_json(self) -> str:
         """Convert to JSON string."""
         return json.dumps(asdict(self), indent=2)
@@ -128,8 +135,6 @@ class SecurityFileManager:
             import secrets
             connection_id = f"clawchat-{now}-{secrets.token_hex(8)}"
         
-        import base64
-        
         security_data = SecurityFile(
             version="2.0",
             protocol="clawchat-file-v2",
@@ -6,6 +6,7 @@ Handles file operations over the encrypted UDP channel.
 
 import os
 import json
+import base64
 from pathlib import Path
 from typing import Optional, Dict, Any
 from dataclasses import dataclass
@@ -157,7 +158,6 @@ class FileProtocolHandler:
                 f.seek(offset)
                 data = f.read(chunk_size)
             
-            import base64
             return {
                 'success': True,
                 'data': base64.b64encode(data).decode('ascii'),
@@ -185,7 +185,6 @@ class FileProtocolHandler:
             return {'error': 'Invalid path or access denied'}
         
         try:
-            import base64
             decoded = base64.b64decode(data)
             
             mode = 'wb' if offset == 0 else 'r+b'
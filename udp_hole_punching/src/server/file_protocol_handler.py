@@ -162,7 +162,8 @@ class FileProtocolHandler:
         except Exception as e:
             return {'error': f'List failed: {e}', 'code': 'LIST_ERROR'}
     
-    def handle_download(self, path: str, offset: int = 0, chunk_size: int = None) -> Dict[str, Any]:
+    def handle_download(self, path: str, offset: int = 0, chunk_size: int = None,
+                        raw: bool = False) -> Dict[str, Any]:
         """
         Download file chunk.
         
@@ -170,9 +171,10 @@ class FileProtocolHandler:
             path: File path
             offset: Byte offset to start from
             chunk_size: Size of chunk (default: self.chunk_size)
+            raw: Return data as bytes instead of base64 (sent as a Message blob)
             
         Returns:
-            Response with file data (base64 encoded)
+            Response with file data (base64 encoded unless raw)
         """
         if chunk_size is None:
             chunk_size = self.chunk_size
@@ -196,29 +198,36 @@ class FileProtocolHandler:
             
             is_eof = (offset + len(data)) >= file_size
             
-            return {
+            response = {
                 'success': True,
                 'path': path,
-                'data': base64.b64encode(data).decode('ascii'),
+                'data': data if raw else base64.b64encode(data).decode('ascii'),
                 'offset': offset,
                 'size': len(data),
                 'total_size': file_size,
                 'eof': is_eof,
-                'hash': hashlib.sha256(data).hexdigest()[:16]
             }
+            # Raw chunks ride inside the AES-GCM packet, whose tag already
+            # authenticates every byte; only legacy base64 replies carry a hash
+            if not raw:
+                response['hash'] = hashlib.sha256(data).hexdigest()[:16]
+            return response
             
         except Exception as e:
             return {'error': f'Download failed: {e}', 'code': 'DOWNLOAD_ERROR'}
     
-    def handle_upload(self, path: str, data: str, offset: int = 0, append: bool = False) -> Dict[str, Any]:
+    def handle_upload(self, path: str, data, offset: int = 0, append: bool = False,
+                      truncate: bool = False) -> Dict[str, Any]:
         """
         Upload file chunk.
         
         Args:
             path: File path
-            data: Base64 encoded data
+            data: Raw bytes, or base64 encoded str
             offset: Byte offset (for resume)
             append: Whether to append to existing file
+            truncate: End the file after this chunk (sent last, usually
+                with no data, so a late duplicate cannot cut off data)
             
         Returns:
             Response with upload status
@@ -237,13 +246,23 @@ class FileProtocolHandler:
             return {'error': f'Cannot create directory: {e}', 'code': 'MKDIR_ERROR'}
         
         try:
-            decoded = base64.b64decode(data)
+            decoded = base64.b64decode(data) if isinstance(data, str) else data
             
-            mode = 'ab' if append else 'wb'
+            if append:
+                mode = 'ab'
+            elif target.exists():
+                # Positional write, offset 0 included: chunks (and stale
+                # retransmits of them) may arrive in any order, so none of
+                # them truncates
+                mode = 'r+b'
+            else:
+                mode = 'wb'
             with open(target, mode) as f:
                 if not append and offset > 0:
                     f.seek(offset)
                 f.write(decoded)
+                if truncate and not append:
+                    f.truncate()
             
             return {
                 'success': True,
@@ -76,6 +76,24 @@ class ClawChatLLMServer:
 		
 		# Security file generator for auto-regeneration
 		self.file_generator = None
+		
+		# Message dispatch: one dict lookup per packet instead of walking
+		# an elif chain (file transfer chunks were near the end of it)
+		self._handlers = {
+			MessageType.CHAT: self._handle_chat,
+			MessageType.FILE_LIST: self._handle_file_list,
+			MessageType.FILE_DOWNLOAD: self._handle_file_download,
+			MessageType.FILE_UPLOAD: self._handle_file_upload,
+			MessageType.FILE_DELETE: self._handle_file_delete,
+			MessageType.FILE_RENAME: self._handle_file_rename,
+			MessageType.FILE_MKDIR: self._handle_file_mkdir,
+			MessageType.CRON_LIST: self._handle_cron_list,
+			MessageType.CRON_RUN: self._handle_cron_run,
+			MessageType.CRON_RELOAD: self._handle_cron_reload,
+			MessageType.CRON_ADD: self._handle_cron_add,
+			MessageType.CRON_REMOVE: self._handle_cron_remove,
+			MessageType.KEEPALIVE: self._handle_keepalive,
+		}
 	
 	def _select_random_port(self) -> int:
 		sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -215,7 +233,7 @@ class ClawChatLLMServer:
 		
 		# Receive message from connected client
 		try:
-			data = self.client_socket.recv(8192)
+			data = self.client_socket.recv(65536)
 			if not data:
 				# Client disconnected
 				print(f"[Server] Client {self.client_address} disconnected")
@@ -251,40 +269,21 @@ class ClawChatLLMServer:
 				if self.file_generator:
 					self.file_generator.mark_client_connected()
 			
-			if msg.msg_type == MessageType.CHAT:
-				self._handle_chat(msg, addr)
-			elif msg.msg_type == MessageType.FILE_LIST:
-				self._handle_file_list(msg, addr)
-			elif msg.msg_type == MessageType.FILE_DOWNLOAD:
-				self._handle_file_download(msg, addr)
-			elif msg.msg_type == MessageType.FILE_UPLOAD:
-				self._handle_file_upload(msg, addr)
-			elif msg.msg_type == MessageType.FILE_DELETE:
-				self._handle_file_delete(msg, addr)
-			elif msg.msg_type == MessageType.FILE_RENAME:
-				self._handle_file_rename(msg, addr)
-			elif msg.msg_type == MessageType.FILE_MKDIR:
-				self._handle_file_mkdir(msg, addr)
-			elif msg.msg_type == MessageType.CRON_LIST:
-				self._handle_cron_list(msg, addr)
-			elif msg.msg_type == MessageType.CRON_RUN:
-				self._handle_cron_run(msg, addr)
-			elif msg.msg_type == MessageType.CRON_RELOAD:
-				self._handle_cron_reload(msg, addr)
-			elif msg.msg_type == MessageType.CRON_ADD:
-				self._handle_cron_add(msg, addr)
-			elif msg.msg_type == MessageType.CRON_REMOVE:
-				self._handle_cron_remove(msg, addr)
-			elif msg.msg_type == MessageType.KEEPALIVE:
-				self._send_message(MessageType.KEEPALIVE, {'pong': True}, addr)
-			
+			handler = self._handlers.get(msg.msg_type)
+			if handler:
+				handler(msg, addr)
+		
 		except Exception as e:
 			print(f"[Server] Message error: {e}")
 	
-	def _send_message(self, msg_type: MessageType, payload: dict, addr):
+	def _handle_keepalive(self, msg: Message, addr):
+		"""Answer a keepalive ping."""
+		self._send_message(MessageType.KEEPALIVE, {'pong': True}, addr)
+	
+	def _send_message(self, msg_type: MessageType, payload: dict, addr, blob: bytes = b""):
 		"""Send response to hole punching server."""
 		try:
-			msg = Message(msg_type=msg_type, payload=payload)
+			msg = Message(msg_type=msg_type, payload=payload, blob=blob)
 			self.socket.sendto(msg.to_bytes(), addr)
 		except Exception as e:
 			print(f"[Server] Send error: {e}")
@@ -332,18 +331,25 @@ class ClawChatLLMServer:
 		"""Handle file download request from hole punching server."""
 		path = msg.payload.get('path', '')
 		offset = msg.payload.get('offset', 0)
-		result = self.file_handler.handle_download(path, offset)
-		self._send_message(MessageType.FILE_DOWNLOAD, result, addr)
+		raw = msg.payload.get('raw', False)
+		result = self.file_handler.handle_download(path, offset, raw=raw)
+		# Raw chunks travel as the message blob instead of base64 in the JSON
+		blob = result.pop('data', b'') if raw else b''
+		self._send_message(MessageType.FILE_DOWNLOAD, result, addr, blob=blob)
 		if result.get('success'):
 			print(f"[File API] Download: {path} ({result.get('size', 0)} bytes)")
 	
 	def _handle_file_upload(self, msg: Message, addr):
 		"""Handle file upload request from hole punching server."""
 		path = msg.payload.get('path', '')
-		data = msg.payload.get('data', '')
+		if msg.payload.get('raw'):
+			data = msg.blob
+		else:
+			data = msg.payload.get('data', '')
 		offset = msg.payload.get('offset', 0)
 		append = msg.payload.get('append', False)
-		result = self.file_handler.handle_upload(path, data, offset, append)
+		truncate = msg.payload.get('truncate', False)
+		result = self.file_handler.handle_upload(path, data, offset, append, truncate)
 		self._send_message(MessageType.FILE_UPLOAD, result, addr)
 		if result.get('success'):
 			print(f"[File API] Upload: {path} ({result.get('bytes_written', 0)} bytes)")
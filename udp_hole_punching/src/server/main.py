@@ -20,6 +20,7 @@ import time
 import socket
 import signal
 import secrets
+import logging
 import argparse
 from pathlib import Path
 from typing import Optional, Tuple
@@ -61,7 +62,7 @@ class ClawChatServer:
 			self.llm_socket.settimeout(60.0)
 			
 			# Receive response
-			data = self.llm_socket.recv(8192)
+			data = self.llm_socket.recv(65536)
 			if not data:
 				print("[Server] LLM server closed connection")
 				self.llm_socket.close()
@@ -137,10 +138,31 @@ class ClawChatServer:
 		self.connection_id: Optional[str] = None
 		self.peer_address: Optional[Tuple[str, int]] = None
 		
+		# Receive buffer reused for every datagram; packets are decrypted
+		# straight from a view of it
+		self._rx_buf = bytearray(65535)
+		self._rx_view = memoryview(self._rx_buf)
+		
 		# Stats
 		self.messages_received = 0
 		self.messages_sent = 0
 		self.start_time = 0.0
+		
+		# Message dispatch table; file and cron traffic is relayed as-is
+		self._handlers = {
+			MessageType.CHAT: self._handle_chat,
+			MessageType.KEEPALIVE: self._handle_keepalive,
+			MessageType.KEY_ROTATION: self._handle_key_rotation,
+			MessageType.COMPROMISED: self._handle_compromised,
+			MessageType.PUNCH: self._handle_punch,
+		}
+		for relay_type in (MessageType.FILE_LIST, MessageType.FILE_DOWNLOAD,
+						   MessageType.FILE_UPLOAD, MessageType.FILE_DELETE,
+						   MessageType.FILE_RENAME, MessageType.FILE_MKDIR,
+						   MessageType.CRON_LIST, MessageType.CRON_RUN,
+						   MessageType.CRON_RELOAD, MessageType.CRON_ADD,
+						   MessageType.CRON_REMOVE, MessageType.CRON_RESULT):
+			self._handlers[relay_type] = self._handle_relay
 	
 	def _select_random_port(self) -> int:
 		"""Select a random available port."""
@@ -216,7 +238,7 @@ class ClawChatServer:
 			
 			# Wait for response (with timeout)
 			self.llm_socket.settimeout(60.0)  # 60s for AI processing
-			data, _ = self.llm_socket.recvfrom(8192)
+			data, _ = self.llm_socket.recvfrom(65536)
 			
 			response = Message.from_bytes(data)
 			return response
@@ -304,6 +326,7 @@ class ClawChatServer:
 		# Create socket
 		self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 		self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		self._tune_socket_buffers()
 		self.socket.bind(('0.0.0.0', self.server_port))
 		self.socket.settimeout(1.0)  # 1 second timeout for recv
 		
@@ -323,6 +346,17 @@ class ClawChatServer:
 		finally:
 			self.stop()
 	
+	def _tune_socket_buffers(self, size: int = 4 * 1024 * 1024):
+		"""Enlarge kernel socket buffers so pipelined transfer bursts are not dropped."""
+		for opt, name in ((socket.SO_RCVBUF, "SO_RCVBUF"), (socket.SO_SNDBUF, "SO_SNDBUF")):
+			try:
+				self.socket.setsockopt(socket.SOL_SOCKET, opt, size)
+			except OSError as e:
+				print(f"[Server] Could not set {name}: {e}")
+			# Kernel may clamp (e.g. net.core.rmem_max) - report what we got
+			effective = self.socket.getsockopt(socket.SOL_SOCKET, opt)
+			print(f"[Server] {name} = {effective} bytes")
+	
 	def _process_loop(self):
 		"""Main processing loop."""
 		# Check for key rotation
@@ -340,15 +374,15 @@ class ClawChatServer:
 		
 		# Receive data
 		try:
-			data, addr = self.socket.recvfrom(2048)
-			self._handle_packet(data, addr)
+			nbytes, addr = self.socket.recvfrom_into(self._rx_buf)  # File chunks exceed 2 KB
+			self._handle_packet(self._rx_view[:nbytes], addr)
 		except socket.timeout:
 			pass
 		except Exception as e:
 			print(f"[Server] Receive error: {e}")
 	
-	def _handle_packet(self, data: bytes, addr: Tuple[str, int]):
-		"""Handle incoming packet."""
+	def _handle_packet(self, data, addr: Tuple[str, int]):
+		"""Handle incoming packet (data may be a view of the receive buffer)."""
 		# Try to decrypt
 		try:
 			plaintext = self.crypto.decrypt_packet(data)
@@ -366,23 +400,9 @@ class ClawChatServer:
 			print(f"[Server] Peer connected: {addr}")
 		
 		# Handle message types
-		if msg.msg_type == MessageType.CHAT:
-			self._handle_chat(msg, addr)
-		elif msg.msg_type == MessageType.KEEPALIVE:
-			self._handle_keepalive(msg, addr)
-		elif msg.msg_type == MessageType.KEY_ROTATION:
-			self._handle_key_rotation(msg, addr)
-		elif msg.msg_type == MessageType.COMPROMISED:
-			self._handle_compromised(msg, addr)
-		elif msg.msg_type == MessageType.PUNCH:
-			self._handle_punch(msg, addr)
-		elif msg.msg_type in (MessageType.FILE_LIST, MessageType.FILE_DOWNLOAD, 
-							  MessageType.FILE_UPLOAD, MessageType.FILE_DELETE,
-							  MessageType.FILE_RENAME, MessageType.FILE_MKDIR,
-							  MessageType.CRON_LIST, MessageType.CRON_RUN, 
-							  MessageType.CRON_RELOAD, MessageType.CRON_ADD,
-							  MessageType.CRON_REMOVE, MessageType.CRON_RESULT):
-			self._handle_relay(msg, addr)
+		handler = self._handlers.get(msg.msg_type)
+		if handler:
+			handler(msg, addr)
 		else:
 			print(f"[Server] Unknown message type: {msg.msg_type}")
 	
@@ -415,7 +435,7 @@ class ClawChatServer:
 		"""Relay file/cron messages to LLM server."""
 		response = self._relay_to_llm(msg)
 		if response:
-			self._send_message(response.msg_type, response.payload)
+			self._send_message(response.msg_type, response.payload, response.blob)
 		else:
 			self._send_message(msg.msg_type, {
 				'success': False,
@@ -442,12 +462,12 @@ class ClawChatServer:
 		self._send_message(MessageType.PUNCH_ACK, {'status': 'ok'})
 		print(f"[Server] Punch from {addr} acknowledged")
 	
-	def _send_message(self, msg_type: MessageType, payload: dict):
+	def _send_message(self, msg_type: MessageType, payload: dict, blob: bytes = b""):
 		"""Send encrypted message to peer."""
 		if not self.peer_address:
 			return
 		
-		msg = Message(msg_type=msg_type, payload=payload)
+		msg = Message(msg_type=msg_type, payload=payload, blob=blob)
 		plaintext = msg.to_bytes()
 		
 		encrypted = self.crypto.encrypt_packet(plaintext)
@@ -488,6 +508,9 @@ def main():
 	
 	args = parser.parse_args()
 	
+	# Library modules log through logging; show their progress like prints
+	logging.basicConfig(level=logging.INFO, format='%(message)s')
+	
 	# Get or generate bootstrap key
 	if args.bootstrap_key:
 		import base64
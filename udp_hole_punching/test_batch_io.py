@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test batched UDP send/receive over localhost
+"""
+
+import sys
+import select
+import socket
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from networking import batch_send, batch_recv
+from networking.batch_send import send_batch
+from networking.batch_recv import RecvBatch
+
+
+def _socket_pair():
+    """Two non-blocking UDP sockets bound to localhost."""
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    rx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for sock in (tx, rx):
+        sock.bind(('127.0.0.1', 0))
+        sock.setblocking(False)
+    return tx, rx
+
+
+def _round_trip(use_recvfrom: bool):
+    """Send a batch from tx to rx and check every datagram arrives intact."""
+    tx, rx = _socket_pair()
+    try:
+        datagrams = [bytes([i]) * (i + 1) for i in range(20)]
+        # bytes, bytearray and memoryview are all accepted
+        datagrams[1] = bytearray(datagrams[1])
+        datagrams[2] = memoryview(datagrams[2])
+        port = rx.getsockname()[1]
+        assert send_batch(tx, datagrams, ('localhost', port)) == len(datagrams)
+        assert send_batch(tx, [], ('localhost', port)) == 0
+
+        batch = RecvBatch(32, 2048, addresses=use_recvfrom)
+        received = []
+        while len(received) < len(datagrams) and select.select([rx], [], [], 2.0)[0]:
+            if use_recvfrom:
+                for data, addr in batch.recvfrom(rx):
+                    assert addr == tx.getsockname(), addr
+                    received.append(bytes(data))
+            else:
+                received.extend(bytes(data) for data in batch.recv(rx))
+
+        assert received == [bytes(d) for d in datagrams], received
+        assert batch.recv(rx) == []  # Drained
+    finally:
+        tx.close()
+        rx.close()
+
+
+def test_batch_io():
+    """sendmmsg / recvmmsg where available."""
+    _round_trip(use_recvfrom=False)
+    _round_trip(use_recvfrom=True)
+
+
+def test_fallback():
+    """sendto / recvfrom_into loops used off Linux."""
+    saved = batch_send._sendmmsg, batch_recv._recvmmsg
+    batch_send._sendmmsg = batch_recv._recvmmsg = None
+    try:
+        _round_trip(use_recvfrom=False)
+        _round_trip(use_recvfrom=True)
+    finally:
+        batch_send._sendmmsg, batch_recv._recvmmsg = saved
+
+
+def test_address_cached():
+    """The destination is resolved once, not once per batch."""
+    tx, rx = _socket_pair()
+    try:
+        address = ('localhost', rx.getsockname()[1])
+        send_batch(tx, [b'a'], address)
+        hits = batch_send._sockaddr_in.cache_info().hits
+        send_batch(tx, [b'b'], address)
+        if batch_send._sendmmsg is not None:
+            assert batch_send._sockaddr_in.cache_info().hits == hits + 1
+    finally:
+        tx.close()
+        rx.close()
+
+
+def main():
+    print("="*60)
+    print("Batch I/O Test")
+    print("="*60)
+    print()
+    print(f"sendmmsg: {'yes' if batch_send._sendmmsg else 'no'}, "
+          f"recvmmsg: {'yes' if batch_recv._recvmmsg else 'no'}")
+    print()
+
+    tests = [
+        ("Batched send and receive", test_batch_io),
+        ("Fallback send and receive", test_fallback),
+        ("Destination resolved once", test_address_cached),
+    ]
+
+    failed = 0
+    for i, (name, test) in enumerate(tests, 1):
+        try:
+            test()
+            print(f"[{i}] {name}... [OK]")
+        except AssertionError as e:
+            failed += 1
+            print(f"[{i}] {name}... [FAIL] {e}")
+
+    print()
+    print("="*60)
+    print("Test complete!" if not failed else f"{failed} test(s) failed")
+    print("="*60)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,6 +5,7 @@ Test the cron system
 
 import sys
 import time
+import tempfile
 from pathlib import Path
 
 sys.path.insert(0, 'src')
@@ -13,6 +14,71 @@ from cron_scheduler import CronParser, CronScheduler
 from datetime import datetime
 
 
+# Sections exercising multi-line **Command** values
+MULTILINE_CRON = """# Cron Jobs
+
+---
+
+## Same Line
+**Schedule**: 0 9 * * *
+**Command**: Summarize the news
+Focus on tech.
+Keep it short.
+**Enabled**: true
+
+---
+
+## Next Line
+**Schedule**: 0 10 * * *
+**Command**:
+    Check the backups
+**Enabled**: false
+
+---
+
+## Inline Fields
+**Schedule**: 0 11 * * *
+**Command**: Ping the server **Enabled**: true
+
+---
+
+## Bare Command
+**Schedule**: 0 12 * * *
+**Command**:
+"""
+
+
+def test_command_parsing():
+    """Command values stop at the end of their line or the next **field**."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cron_file = Path(tmp) / 'CRON.md'
+        cron_file.write_text(MULTILINE_CRON, encoding='utf-8')
+        jobs = {job.name: job for job in CronParser.parse(cron_file)}
+    
+    # Continuation lines belong to the context, not the command
+    same_line = jobs['Same Line']
+    assert same_line.command == 'Summarize the news', same_line.command
+    assert same_line.context.startswith('Focus on tech.\nKeep it short.'), same_line.context
+    
+    # A value on the line after the field is still picked up
+    next_line = jobs['Next Line']
+    assert next_line.command == 'Check the backups', next_line.command
+    assert not next_line.enabled
+    
+    # A following field on the same line ends the command
+    inline = jobs['Inline Fields']
+    assert inline.command == 'Ping the server', inline.command
+    assert inline.enabled
+    
+    # A bare **Command**: ending the section has no value: the section is
+    # skipped. The old DOTALL pattern made an empty-command job from it
+    # when a newline followed, so check that case directly too.
+    assert 'Bare Command' not in jobs, jobs.get('Bare Command')
+    assert CronParser._parse_job('## Bare\n**Command**:\n') is None
+    
+    return len(jobs)
+
+
 def main():
     print("="*60)
     print("Cron System Test")
@@ -70,6 +136,11 @@ def main():
         print(f"      Command: {job.command[:50]}...")
         print(f"      Context: {job.context[:50] if job.context else '(none)'}...")
     
+    print()
+    print("[5] Parsing multi-line Command values...")
+    count = test_command_parsing()
+    print(f"    [OK] {count} jobs parsed as expected")
+    
     print()
     print("="*60)
     print("Test complete!")
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Test the message and packet wire formats
+"""
+
+import sys
+import zlib
+import struct
+import secrets
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from protocol.messages import (
+    Message, MessageType, MessageHandler, _dumps, _COMPRESS_MIN, _COMPRESSED, _INFLATE_MAX
+)
+from security.encryption import (
+    CryptoManager, DecryptionError, AuthenticationError
+)
+from networking.udp_hole_punch import UDPHolePuncher
+
+
+def _crypto() -> CryptoManager:
+    """A CryptoManager with fresh random session keys."""
+    crypto = CryptoManager()
+    crypto.set_session_keys({name: secrets.token_bytes(32) for name in
+                             ('encryption_key', 'mac_key', 'iv_key', 'next_key_seed')})
+    return crypto
+
+
+def _expect(exc_type, func, *args):
+    """Call func and check it raises exc_type."""
+    try:
+        func(*args)
+    except exc_type:
+        return
+    raise AssertionError(f"{func.__name__} did not raise {exc_type.__name__}")
+
+
+def _payload_of_size(size: int) -> dict:
+    """A FILE_LIST payload whose JSON is exactly size bytes."""
+    overhead = len(_dumps({'items': ''}))
+    return {'items': 'a' * (size - overhead)}
+
+
+def _frame_raw(wire_type: int, payload: bytes) -> bytes:
+    """Hand-built message bytes, for payloads the encoder would never produce."""
+    msg_id = b'0123456789abcdef'
+    return (struct.pack('!BdB', wire_type, 0.0, len(msg_id)) + msg_id
+            + struct.pack('!I', len(payload)) + payload)
+
+
+def test_compression_round_trip():
+    """Long listings are deflated and decode back to the same message."""
+    payload = {'items': [{'name': f'file{i}.txt', 'size': i} for i in range(200)]}
+    msg = Message(MessageType.FILE_LIST, payload)
+    data = msg.to_bytes()
+    assert data[0] == MessageType.FILE_LIST | _COMPRESSED
+    assert len(data) < len(_dumps(payload))
+
+    decoded = Message.from_bytes(data)
+    assert decoded.msg_type == MessageType.FILE_LIST
+    assert decoded.payload == payload
+    assert decoded.message_id == msg.message_id
+
+    # The template encoder takes the same path
+    decoded = Message.from_bytes(MessageHandler.encode(MessageType.FILE_LIST, {'path': 'x' * 1000}))
+    assert decoded.payload == {'path': 'x' * 1000}
+
+
+def test_compression_threshold():
+    """Only payloads longer than _COMPRESS_MIN bytes are deflated."""
+    at_limit = _payload_of_size(_COMPRESS_MIN)
+    data = Message(MessageType.FILE_LIST, at_limit).to_bytes()
+    assert data[0] == MessageType.FILE_LIST, "512-byte payload must stay plain"
+    assert Message.from_bytes(data).payload == at_limit
+
+    over_limit = _payload_of_size(_COMPRESS_MIN + 1)
+    data = Message(MessageType.FILE_LIST, over_limit).to_bytes()
+    assert data[0] == MessageType.FILE_LIST | _COMPRESSED, "513-byte payload must be deflated"
+    assert Message.from_bytes(data).payload == over_limit
+
+
+def test_chat_never_compressed():
+    """Chat, cron and LLM text stay uncompressed however long (CRIME)."""
+    text = 'secret ' * 500
+    for msg_type in (MessageType.CHAT, MessageType.CRON_LIST, MessageType.CRON_RESULT):
+        data = Message(msg_type, {'text': text}).to_bytes()
+        assert data[0] == msg_type, msg_type.name
+    assert MessageHandler.encode_chat(text, 'user')[0] == MessageType.CHAT
+
+
+def test_inflate_rejects_bad_payloads():
+    """Corrupt deflate data and oversized payloads are rejected."""
+    try:
+        Message.from_bytes(_frame_raw(MessageType.FILE_LIST | _COMPRESSED, b'not deflate data'))
+    except zlib.error:
+        pass
+    else:
+        raise AssertionError("corrupt deflate data accepted")
+
+    # Inflates past the cap: a few KB on the wire, > 16 MB decoded
+    bomb = zlib.compress(b'{"items":"' + b'a' * (_INFLATE_MAX + 1) + b'"}', 9)
+    try:
+        Message.from_bytes(_frame_raw(MessageType.FILE_LIST | _COMPRESSED, bomb))
+    except ValueError as e:
+        assert 'too large' in str(e), e
+    else:
+        raise AssertionError("oversized payload accepted")
+
+
+def test_blob_round_trip():
+    """The binary trailer survives empty, plain and compressed payloads."""
+    blob = bytes(range(256)) * 4
+
+    decoded = Message.from_bytes(Message(MessageType.FILE_DATA, {}, blob=blob).to_bytes())
+    assert decoded.payload == {} and decoded.blob == blob
+
+    encode = MessageHandler.int_field_encoder(
+        MessageType.FILE_DATA, {'transfer_id': 'abc'}, 'offset')
+    decoded = Message.from_bytes(encode(4096, blob))
+    assert decoded.payload == {'transfer_id': 'abc', 'offset': 4096}
+    assert decoded.blob == blob
+    assert Message.from_bytes(encode(0)).blob == b''
+
+    payload = {'items': ['x' * 40] * 50}
+    data = Message(MessageType.FILE_LIST, payload, blob=blob).to_bytes()
+    assert data[0] & _COMPRESSED
+    decoded = Message.from_bytes(data)
+    assert decoded.payload == payload and decoded.blob == blob
+
+
+def test_truncated_header():
+    """Messages cut inside the payload_len field are rejected."""
+    data = Message(MessageType.CHAT, {'text': 'hi'}).to_bytes()
+    payload_len_at = 1 + 8 + 1 + data[9]
+    for cut in range(payload_len_at, payload_len_at + 4):
+        _expect(struct.error, Message.from_bytes, data[:cut])
+    assert MessageHandler.parse_message(data[:payload_len_at + 2]) is None
+
+
+def test_packet_magic():
+    """decrypt_packet rejects short, unmarked and tampered packets."""
+    crypto = _crypto()
+    packet = crypto.encrypt_packet(b'hello')
+    assert packet[:4] == b'CLW1'
+    assert crypto.decrypt_packet(packet) == b'hello'
+    assert crypto.decrypt_packet(memoryview(packet)) == b'hello'
+
+    _expect(DecryptionError, crypto.decrypt_packet, packet[:31])
+    _expect(DecryptionError, crypto.decrypt_packet, b'CLW0' + packet[4:])
+
+    tampered = bytearray(packet)
+    tampered[-1] ^= 1
+    _expect(AuthenticationError, crypto.decrypt_packet, bytes(tampered))
+    _expect(AuthenticationError, crypto.decrypt_packet, packet, b'aad')
+
+
+def test_punch_packet():
+    """Punch packets carry an authenticated clear-text type byte."""
+    puncher = UDPHolePuncher(_crypto())
+    for packet_type in (UDPHolePuncher.PKT_PUNCH, UDPHolePuncher.PKT_PUNCH_ACK):
+        packet = puncher._create_punch_packet(packet_type)
+        assert len(packet) == UDPHolePuncher._PACKET_LEN
+        assert packet[0] == packet_type
+        assert puncher._parse_packet(packet) == packet_type
+        assert puncher._parse_packet(memoryview(packet)) == packet_type
+
+    packet = puncher._create_punch_packet(UDPHolePuncher.PKT_PUNCH)
+    assert puncher._parse_packet(packet[:-1]) is None
+    assert puncher._parse_packet(packet + b'\x00') is None
+    assert puncher._parse_packet(b'\x7f' + packet[1:]) is None
+    # Valid type, but not the one that was authenticated
+    assert puncher._parse_packet(bytes((UDPHolePuncher.PKT_PUNCH_ACK,)) + packet[1:]) is None
+    # Packets from another session fail authentication
+    assert UDPHolePuncher(_crypto())._parse_packet(packet) is None
+
+
+def main():
+    print("="*60)
+    print("Wire Format Test")
+    print("="*60)
+    print()
+
+    tests = [
+        ("Compressed round trip", test_compression_round_trip),
+        ("Compression threshold (512 / 513 bytes)", test_compression_threshold),
+        ("Chat and LLM text uncompressed", test_chat_never_compressed),
+        ("Corrupt and oversized deflate rejected", test_inflate_rejects_bad_payloads),
+        ("Blob with empty, plain and compressed payloads", test_blob_round_trip),
+        ("Truncated payload_len rejected", test_truncated_header),
+        ("Packet magic and authentication", test_packet_magic),
+        ("Punch packet type byte", test_punch_packet),
+    ]
+
+    failed = 0
+    for i, (name, test) in enumerate(tests, 1):
+        try:
+            test()
+            print(f"[{i}] {name}... [OK]")
+        except AssertionError as e:
+            failed += 1
+            print(f"[{i}] {name}... [FAIL] {e}")
+
+    print()
+    print("="*60)
+    print("Test complete!" if not failed else f"{failed} test(s) failed")
+    print("="*60)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())